@@ -0,0 +1,25 @@
+"""add item (owner_id, id) index
+
+Revision ID: 191140d33d37
+Revises: dfc15b624fcd
+Create Date: 2026-10-18 11:34:08.512947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '191140d33d37'
+down_revision = 'dfc15b624fcd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_item_owner_id_id', 'item', ['owner_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_item_owner_id_id', table_name='item')
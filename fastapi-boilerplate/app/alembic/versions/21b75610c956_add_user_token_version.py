@@ -0,0 +1,28 @@
+"""add user token_version
+
+Revision ID: 21b75610c956
+Revises: ab245f407983
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '21b75610c956'
+down_revision = 'ab245f407983'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'accounts_user',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_column('accounts_user', 'token_version')
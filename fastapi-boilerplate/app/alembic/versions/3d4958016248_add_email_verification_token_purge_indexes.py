@@ -0,0 +1,39 @@
+"""add email_verification_tokens purge indexes
+
+Revision ID: 3d4958016248
+Revises: 191140d33d37
+Create Date: 2026-10-18 12:21:45.097316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3d4958016248'
+down_revision = '191140d33d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_email_verification_tokens_unused_expires_at',
+        'email_verification_tokens',
+        ['expires_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_used'),
+    )
+    op.create_index(
+        'ix_email_verification_tokens_used',
+        'email_verification_tokens',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('is_used'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_email_verification_tokens_used', table_name='email_verification_tokens')
+    op.drop_index('ix_email_verification_tokens_unused_expires_at', table_name='email_verification_tokens')
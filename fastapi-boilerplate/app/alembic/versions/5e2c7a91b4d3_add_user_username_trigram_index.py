@@ -0,0 +1,28 @@
+"""add accounts_user username trigram index
+
+Revision ID: 5e2c7a91b4d3
+Revises: 3d4958016248
+Create Date: 2026-10-18 18:05:12.418530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+from app.fast_framework.migrations import create_trigram_index, drop_trigram_index
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2c7a91b4d3'
+down_revision = '3d4958016248'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The user search filter also matches on username
+    create_trigram_index("accounts_user", "username")
+
+
+def downgrade():
+    drop_trigram_index("accounts_user", "username")
@@ -0,0 +1,25 @@
+"""add accounts_user (created_at, id) index
+
+Revision ID: a33e1f9dfc76
+Revises: 21b75610c956
+Create Date: 2026-10-18 10:02:11.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a33e1f9dfc76'
+down_revision = '21b75610c956'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_accounts_user_created_at_id', 'accounts_user', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_accounts_user_created_at_id', table_name='accounts_user')
@@ -0,0 +1,31 @@
+"""add accounts_user search trigram indexes
+
+Revision ID: dfc15b624fcd
+Revises: a33e1f9dfc76
+Create Date: 2026-10-18 10:47:53.271094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+from app.fast_framework.migrations import create_trigram_index, drop_trigram_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'dfc15b624fcd'
+down_revision = 'a33e1f9dfc76'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ["email", "first_name", "last_name"]
+
+
+def upgrade():
+    for column in SEARCH_COLUMNS:
+        create_trigram_index("accounts_user", column)
+
+
+def downgrade():
+    for column in SEARCH_COLUMNS:
+        drop_trigram_index("accounts_user", column)
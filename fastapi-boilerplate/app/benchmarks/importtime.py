@@ -0,0 +1,89 @@
+"""
+What importing the app costs, from ``python -X importtime`` in a fresh
+interpreter, grouped by top-level package. Exits non-zero when the total
+exceeds ``--budget-ms`` so CI can catch an eager import creeping back in::
+
+    python -m app.benchmarks.importtime --top 15 --budget-ms 1000
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure(target: str) -> list[ImportRecord]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr}")
+    records = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(
+                ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+    return records
+
+
+def by_package(records: list[ImportRecord]) -> dict[str, int]:
+    totals: dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.module.partition(".")[0]] += record.self_us
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", default="app.core.asgi")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument(
+        "--modules", action="store_true", help="list slowest modules instead of packages"
+    )
+    args = parser.parse_args()
+
+    records = measure(args.target)
+    total_ms = sum(record.self_us for record in records) / 1000
+
+    if args.modules:
+        rows = [(r.module, r.self_us, r.cumulative_us) for r in records]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        sys.stdout.write(f"{'module':<50} {'self ms':>9} {'cumul ms':>9}\n")
+        for module, self_us, cumulative_us in rows[: args.top]:
+            sys.stdout.write(
+                f"{module:<50} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}\n"
+            )
+    else:
+        totals = sorted(by_package(records).items(), key=lambda item: item[1], reverse=True)
+        sys.stdout.write(f"{'package':<30} {'ms':>9} {'share':>7}\n")
+        for package, self_us in totals[: args.top]:
+            share = self_us / 1000 / total_ms if total_ms else 0
+            sys.stdout.write(f"{package:<30} {self_us / 1000:>9.1f} {share:>7.1%}\n")
+
+    sys.stdout.write(f"\nimport {args.target}: {total_ms:.1f} ms across {len(records)} modules\n")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        sys.exit(f"over budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Per-row cost of serializing a users list page.
+
+Compares the default FastAPI path (response_model re-validation and
+serialization, stdlib json) with ORJSON, a ModelResponse over a validated
+page, and the unvalidated construct_from_rows page the list endpoints use. No database needed::
+
+    python -m app.benchmarks.serialization --rows 100 --repeat 200
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime
+
+import orjson
+from fastapi._compat import ModelField
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.fast_framework.responses import ModelResponse, construct_from_rows
+from app.mainapps.accounts.models import User
+from app.mainapps.accounts.serializers import UserPublic, UsersPublic
+
+
+def make_users(rows: int) -> list[User]:
+    return [
+        User(
+            id=uuid.uuid4(),
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            first_name="First",
+            last_name="Last",
+            hashed_password="x" * 60,
+            created_at=datetime.now(),
+            last_login=datetime.now(),
+        )
+        for i in range(rows)
+    ]
+
+
+async def fastapi_default(field: ModelField, users: list[User]) -> bytes:
+    content = await serialize_response(
+        field=field, response_content=UsersPublic(data=users, count=len(users))
+    )
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+async def fastapi_orjson(field: ModelField, users: list[User]) -> bytes:
+    content = await serialize_response(
+        field=field, response_content=UsersPublic(data=users, count=len(users))
+    )
+    return orjson.dumps(content)
+
+
+async def model_response(_field: ModelField, users: list[User]) -> bytes:
+    return ModelResponse(UsersPublic(data=users, count=len(users))).body
+
+
+async def constructed_model_response(_field: ModelField, users: list[User]) -> bytes:
+    page = UsersPublic.model_construct(
+        data=construct_from_rows(UserPublic, users), count=len(users)
+    )
+    return ModelResponse(page).body
+
+
+async def run(fn: Callable, field: ModelField, users: list[User], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn(field, users)
+    return (time.perf_counter() - start) / repeat / len(users)
+
+
+def main() -> None:
+    import asyncio
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    users = make_users(args.rows)
+    field = create_model_field(name="Response_read_users", type_=UsersPublic, mode="serialization")
+    for name, fn in (
+        ("fastapi default (json)", fastapi_default),
+        ("fastapi + orjson", fastapi_orjson),
+        ("ModelResponse", model_response),
+        ("constructed ModelResponse", constructed_model_response),
+    ):
+        per_row = asyncio.run(run(fn, field, users, args.repeat))
+        sys.stdout.write(f"{name:<28} {per_row * 1e6:8.2f} us/row\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,28 @@
-import sentry_sdk
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.mainapps.accounts.api.urls import api_router
 from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core import nplusone
+from app.core.compression import CompressionMiddleware, PrecompressedOpenAPI
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint
+from app.core.security import password_hasher
+from app.mainapps.accounts.last_login import last_login_buffer
+from app.mainapps.accounts.outbox import email_outbox
+from app.mainapps.accounts.token_purge import token_purge_job
+
+# Sentry, SSO (fastapi_sso, httpx) and email (emails, jinja2) are imported
+# only when configured, keeping them out of the import path of every worker,
+# CLI and script that touches the app. `python -m app.benchmarks.importtime`
+# reports what importing this module costs.
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -12,23 +30,95 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{tag}-{route.name}"
 
 
-if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+def init_sentry() -> None:
+    if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+        import sentry_sdk
+
+        sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.emails_enabled:
+        from app.mainapps.accounts.utils import precompile_email_templates
+
+        precompile_email_templates()
+        if settings.EMAIL_OUTBOX_ENABLED:
+            email_outbox.start()
+    app.state.openapi_document.build()
+    if settings.sso_enabled:
+        from app.core.sso import warm_sso_discovery
+
+        await warm_sso_discovery()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_buffer.start()
+    token_purge_job.start()
+    yield
+    await token_purge_job.stop()
+    await last_login_buffer.stop()
+    await email_outbox.stop()
+    # Waits for in-flight hashes; keep that wait off the event loop
+    await asyncio.to_thread(password_hasher.shutdown)
+    # Only loaded if SSO was configured or a login went through it
+    if "app.core.sso" in sys.modules:
+        await sys.modules["app.core.sso"].discovery_cache.aclose()
+
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    generate_unique_id_function=custom_generate_unique_id,
-)
+def create_app() -> FastAPI:
+    init_sentry()
 
-# Set all CORS enabled origins
-if settings.all_cors_origins:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.all_cors_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        generate_unique_id_function=custom_generate_unique_id,
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+    # Set all CORS enabled origins
+    if settings.all_cors_origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.all_cors_origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+        instrument_engine(async_engine.sync_engine)
+        app.add_middleware(
+            MetricsMiddleware,
+            sample_rate=settings.METRICS_SAMPLE_RATE,
+            slow_request_threshold=settings.SLOW_REQUEST_THRESHOLD_MS / 1000,
+        )
+        if settings.METRICS_TOKEN:
+            app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+    if settings.NPLUSONE_DETECTION != "off":
+        nplusone.instrument_engine(engine)
+        nplusone.instrument_engine(async_engine.sync_engine)
+        app.add_middleware(
+            nplusone.NPlusOneMiddleware,
+            threshold=settings.NPLUSONE_THRESHOLD,
+            raise_errors=settings.NPLUSONE_DETECTION == "raise",
+        )
+
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    # Rendered and compressed once at startup, after every router is included
+    app.state.openapi_document = PrecompressedOpenAPI(app)
+    app.state.openapi_document.install()
+    return app
+
+
+app = create_app()
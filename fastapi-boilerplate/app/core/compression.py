@@ -0,0 +1,225 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` negotiates brotli (when the optional ``brotli``
+package is installed) or gzip from Accept-Encoding, and only compresses
+allowlisted content types at or above ``minimum_size`` bytes. Streaming
+bodies are compressed chunk by chunk with a flush after each one, so rows
+from ``StreamingResponse`` exports still reach the client as they are
+produced. Responses of those types carry ``Vary: Accept-Encoding`` whether
+or not this one was compressed, so shared caches keep the variants apart.
+
+``PrecompressedOpenAPI`` renders the OpenAPI document once and keeps
+identity/gzip/brotli copies of it, instead of compressing it per request.
+"""
+import gzip
+import zlib
+from typing import Any
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Codings with a non-zero q-value ("gzip; q=0.0" is a refusal too)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, *, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress and flush, so everything sent so far can be decoded."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        compressible_types: tuple[str, ...] = DEFAULT_COMPRESSIBLE_TYPES,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressible_types = compressible_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        # Also wrapped without an encoding, to add Vary to what goes out as is
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def is_compressible_type(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self.compressible_types)
+
+    def is_compressible(self, headers: Headers) -> bool:
+        if not self.is_compressible_type(headers):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.minimum_size
+
+
+class CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str | None, send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Message | None = None
+        self.compressor: StreamCompressor | None = None
+        self.passthrough = False
+
+    def new_compressor(self) -> StreamCompressor:
+        return StreamCompressor(
+            self.encoding,
+            gzip_level=self.middleware.gzip_level,
+            brotli_quality=self.middleware.brotli_quality,
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            if self.middleware.is_compressible_type(headers):
+                # Whether this body is compressed depends on Accept-Encoding,
+                # even when this one (small, or not accepted) goes out as is
+                headers.add_vary_header("Accept-Encoding")
+            self.passthrough = self.encoding is None or not self.middleware.is_compressible(
+                headers
+            )
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        assert self.start_message is not None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body:
+                # Whole body in one message: compress only when worth it
+                if len(body) < self.middleware.minimum_size:
+                    await self._send(self.start_message)
+                    await self._send(message)
+                    return
+                body = self.new_compressor().finish(body)
+                headers["Content-Length"] = str(len(body))
+            else:
+                self.compressor = self.new_compressor()
+                del headers["Content-Length"]
+                body = self.compressor.compress(body)
+            headers["Content-Encoding"] = self.encoding
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if more_body:
+            body = self.compressor.compress(body)
+        else:
+            body = self.compressor.finish(body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class PrecompressedOpenAPI:
+    """Serves ``app.openapi()`` from bytes rendered and compressed once."""
+
+    def __init__(self, app: FastAPI) -> None:
+        self.app = app
+        self.variants: dict[str, bytes] = {}
+
+    def build(self) -> None:
+        import orjson
+
+        body = orjson.dumps(self.app.openapi())
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+        self.variants = variants
+
+    async def endpoint(self, request: Request) -> Response:
+        if not self.variants:
+            self.build()
+        encoding = choose_encoding(request.headers.get("accept-encoding", "")) or "identity"
+        headers: dict[str, Any] = {"Vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type="application/json", headers=headers)
+
+    def install(self) -> None:
+        """Replace the openapi route FastAPI registered at ``app.openapi_url``."""
+        routes = self.app.router.routes
+        for index, route in enumerate(routes):
+            if isinstance(route, Route) and route.path == self.app.openapi_url:
+                routes[index] = Route(
+                    self.app.openapi_url, self.endpoint, include_in_schema=False
+                )
+                return
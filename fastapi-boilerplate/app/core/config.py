@@ -34,6 +34,29 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Embed is_active/is_superuser/is_verified/token_version in access tokens
+    # and authorize from the claims instead of loading the user per request
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = False
+    # How long a worker trusts its cached (is_active, token_version) for a
+    # user, i.e. the upper bound for a deactivation/revocation to take effect
+    TOKEN_STATE_CACHE_TTL_SECONDS: int = 5
+    TOKEN_STATE_CACHE_MAX_SIZE: int = 10_000
+    # Per-worker cache of user rows used by authentication and email lookups;
+    # the TTL bounds how stale another worker's copy can get
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10_000
+    # Buffer last_login/last_login_ip per worker and write them in batches
+    # every LAST_LOGIN_FLUSH_INTERVAL_SECONDS; disabled commits on each login
+    LAST_LOGIN_WRITE_BEHIND: bool = True
+    LAST_LOGIN_FLUSH_INTERVAL_SECONDS: float = 5.0
+    # Users with a pending update; past this, logins write synchronously
+    LAST_LOGIN_BUFFER_MAX_SIZE: int = 10_000
+    # Used/expired email verification tokens are deleted by each worker every
+    # TOKEN_PURGE_INTERVAL_SECONDS (0 disables; cron the CLI instead), in
+    # batches of TOKEN_PURGE_BATCH_SIZE rows, at most TOKEN_PURGE_MAX_BATCHES per run
+    TOKEN_PURGE_INTERVAL_SECONDS: float = 3600
+    TOKEN_PURGE_BATCH_SIZE: int = 5000
+    TOKEN_PURGE_MAX_BATCHES: int = 200
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
     SERVER_HOST: str = "http://localhost:8000"
@@ -72,6 +95,62 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        return PostgresDsn.build(
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    # Connection pool, applied to both the sync and the async engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds before a connection is recycled, -1 to disable
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Running behind PgBouncer in transaction mode: no app-side pooling and
+    # no server-side prepared statements
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Request/SQL instrumentation exposed at /metrics. METRICS_SAMPLE_RATE is
+    # the fraction of requests measured; 0 leaves only a pass-through.
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_RATE: float = 1.0
+    # Bearer token the scraper sends to /metrics; the route isn't mounted
+    # without one
+    METRICS_TOKEN: str | None = None
+    # Sampled requests slower than this are logged with their slowest queries
+    SLOW_REQUEST_THRESHOLD_MS: int = 1000
+    # Development/test only: "log" or "raise" when a request runs the same
+    # statement NPLUSONE_THRESHOLD times or more
+    NPLUSONE_DETECTION: Literal["off", "log", "raise"] = "off"
+    NPLUSONE_THRESHOLD: int = 5
+
+    # gzip/brotli (brotli needs the optional "brotli" package) for JSON, NDJSON
+    # and text responses of at least COMPRESSION_MINIMUM_SIZE bytes
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # How list endpoints compute "count": exact, cached (per filter signature
+    # for LIST_COUNT_CACHE_SECONDS) or estimate (planner estimate once it is
+    # above LIST_COUNT_ESTIMATE_THRESHOLD rows, cached exact count below)
+    LIST_COUNT_STRATEGY: Literal["exact", "cached", "estimate"] = "exact"
+    LIST_COUNT_CACHE_SECONDS: int = 30
+    LIST_COUNT_ESTIMATE_THRESHOLD: int = 100_000
+
+    # bcrypt cost factor; existing hashes are upgraded on the next login
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Threads per process reserved for password hashing/verification
+    PASSWORD_HASH_WORKERS: int = 2
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -88,6 +167,23 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24
+    # Issue signed, self-contained verification tokens instead of storing one
+    # row per signup; links issued in either mode keep working after a switch
+    EMAIL_VERIFICATION_STATELESS: bool = False
+    # Per-worker set of consumed stateless token ids, kept until they expire
+    EMAIL_VERIFICATION_USED_CACHE_MAX_SIZE: int = 100_000
+    # Where compiled email templates are cached; None uses the system temp dir
+    EMAIL_TEMPLATES_BYTECODE_CACHE_DIR: str | None = None
+
+    # Background email outbox: handlers enqueue, one worker per process sends
+    # over a reused SMTP connection. Disabled means send inline.
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_MAX_SIZE: int = 10_000
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    # Retry delay doubles on each attempt, starting from this many seconds
+    EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS: float = 2.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -103,6 +199,20 @@ class Settings(BaseSettings):
     # Google SSO
     GOOGLE_CLIENT_ID: str | None = None
     GOOGLE_CLIENT_SECRET: str | None = None
+    # How long provider discovery documents are served before a background refresh
+    SSO_DISCOVERY_CACHE_TTL_SECONDS: int = 3600
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def sso_enabled(self) -> bool:
+        return any(
+            client_id and client_secret
+            for client_id, client_secret in (
+                (self.GOOGLE_CLIENT_ID, self.GOOGLE_CLIENT_SECRET),
+                (self.MICROSOFT_CLIENT_ID, self.MICROSOFT_CLIENT_SECRET),
+                (self.LINKEDIN_CLIENT_ID, self.LINKEDIN_CLIENT_SECRET),
+            )
+        )
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
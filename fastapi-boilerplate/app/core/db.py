@@ -1,11 +1,62 @@
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
 from app.core.config import settings
+from app.core.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+)
 from app.mainapps.accounts.models import User
 from app.mainapps.accounts.serializers import UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def get_engine_options(*, is_async: bool = False) -> dict[str, Any]:
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer owns the pool; prepared statements don't survive
+        # transaction pooling so turn them off for both drivers. asyncpg still
+        # prepares every statement, so give each a unique name to avoid
+        # "prepared statement already exists" on a reused server connection.
+        if is_async:
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        else:
+            connect_args = {"prepare_threshold": None}
+        return {"poolclass": InstrumentedNullPool, "connect_args": connect_args}
+
+    return {
+        "poolclass": (
+            InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool
+        ),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **get_engine_options())
+
+# Async engine (asyncpg) used by the request handlers so they can await the
+# database on the event loop instead of holding a threadpool worker.
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI), **get_engine_options(is_async=True)
+)
+
+# expire_on_commit=False: attributes can't be lazily refreshed outside of an
+# awaitable context, so keep the loaded state after a commit.
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,288 @@
+"""
+Request latency and SQL instrumentation.
+
+``MetricsMiddleware`` times sampled requests and, through SQLAlchemy engine
+events, counts the statements each one runs and the time spent in them.
+Totals are kept per worker process and rendered in the Prometheus text
+format by ``metrics_endpoint``. Requests that aren't sampled only pay for
+one random number.
+"""
+import logging
+import random
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.pool import pool_status
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+JOB_ROW_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+# Statements kept per request for the slow-request log
+MAX_RECORDED_STATEMENTS = 50
+
+
+@dataclass
+class RequestMetrics:
+    statements: int = 0
+    db_time: float = 0.0
+    queries: list[tuple[float, str]] = field(default_factory=list)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.db_time += duration
+        if len(self.queries) < MAX_RECORDED_STATEMENTS:
+            self.queries.append((duration, statement))
+
+
+current_request_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_request_metrics", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency: dict[tuple[str, str, str], Histogram] = {}
+        self.db_time: dict[tuple[str, str], Histogram] = {}
+        self.statements: dict[tuple[str, str], int] = {}
+        self.slow_requests = 0
+        self.job_duration: dict[tuple[str], Histogram] = {}
+        self.job_rows: dict[tuple[str], Histogram] = {}
+        self.job_runs: dict[tuple[str, str], int] = {}
+
+    def observe_job(self, job: str, duration: float, rows: int, status: str = "ok") -> None:
+        """Record one run of a background or CLI job and the rows it processed."""
+        with self._lock:
+            if (job,) not in self.job_duration:
+                self.job_duration[(job,)] = Histogram(JOB_DURATION_BUCKETS)
+                self.job_rows[(job,)] = Histogram(JOB_ROW_BUCKETS)
+            self.job_duration[(job,)].observe(duration)
+            self.job_rows[(job,)].observe(rows)
+            self.job_runs[(job, status)] = self.job_runs.get((job, status), 0) + 1
+
+    def observe_request(
+        self, method: str, route: str, status: int, duration: float, db: RequestMetrics
+    ) -> None:
+        with self._lock:
+            key = (method, route, str(status))
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+            self.latency[key].observe(duration)
+            route_key = (method, route)
+            if route_key not in self.db_time:
+                self.db_time[route_key] = Histogram()
+            self.db_time[route_key].observe(db.db_time)
+            self.statements[route_key] = self.statements.get(route_key, 0) + db.statements
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            lines += _render_histogram(
+                "http_request_duration_seconds",
+                "Request latency by route",
+                self.latency,
+                ("method", "route", "status"),
+            )
+            lines += _render_histogram(
+                "http_request_db_seconds",
+                "Time spent in SQL per request by route",
+                self.db_time,
+                ("method", "route"),
+            )
+            lines += [
+                "# HELP http_request_db_statements_total SQL statements run by route",
+                "# TYPE http_request_db_statements_total counter",
+            ]
+            for (method, route), value in self.statements.items():
+                lines.append(
+                    f"http_request_db_statements_total{_labels(method=method, route=route)} {value}"
+                )
+            lines += [
+                "# HELP http_slow_requests_total Requests over SLOW_REQUEST_THRESHOLD_MS",
+                "# TYPE http_slow_requests_total counter",
+                f"http_slow_requests_total {self.slow_requests}",
+            ]
+            lines += _render_histogram(
+                "job_duration_seconds", "Duration of job runs", self.job_duration, ("job",)
+            )
+            lines += _render_histogram(
+                "job_rows", "Rows processed per job run", self.job_rows, ("job",)
+            )
+            lines += [
+                "# HELP job_runs_total Job runs by outcome",
+                "# TYPE job_runs_total counter",
+            ]
+            for (job, status), value in self.job_runs.items():
+                lines.append(f"job_runs_total{_labels(job=job, status=status)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _render_histogram(
+    name: str, help: str, series: dict[tuple, Histogram], label_names: tuple[str, ...]
+) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for key, histogram in series.items():
+        labels = dict(zip(label_names, key, strict=True))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts[:-1], strict=True):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=str(bound))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.total}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    if current_request_metrics.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    metrics = current_request_metrics.get()
+    if metrics is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if starts:
+        metrics.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the per-request SQL counters; pass ``async_engine.sync_engine`` for async engines."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 1.0,
+        slow_request_threshold: float = 1.0,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_threshold = slow_request_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            current_request_metrics.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            registry.observe_request(
+                scope["method"], route_path, status_code, duration, metrics
+            )
+            if duration >= self.slow_request_threshold:
+                self.log_slow_request(scope, route_path, status_code, duration, metrics)
+
+    def log_slow_request(
+        self,
+        scope: Scope,
+        route: str,
+        status_code: int,
+        duration: float,
+        metrics: RequestMetrics,
+    ) -> None:
+        registry.slow_requests += 1
+        slowest = sorted(metrics.queries, reverse=True)[:5]
+        logger.warning(
+            "Slow request %s %s (%s) %s in %.0fms: %s statements, %.0fms in SQL%s",
+            scope["method"],
+            scope["path"],
+            route,
+            status_code,
+            duration * 1000,
+            metrics.statements,
+            metrics.db_time * 1000,
+            "".join(f"\n  {d * 1000:.1f}ms {sql}" for d, sql in slowest),
+        )
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    expected = settings.METRICS_TOKEN or ""
+    if not expected or scheme.lower() != "bearer" or not secrets.compare_digest(token, expected):
+        return PlainTextResponse(
+            "Not authenticated", status_code=401, headers={"WWW-Authenticate": "Bearer"}
+        )
+    connections = [
+        "# HELP db_pool_connections Connection pool state by engine",
+        "# TYPE db_pool_connections gauge",
+    ]
+    timeouts = [
+        "# HELP db_pool_timeouts_total Checkouts that timed out waiting for a connection",
+        "# TYPE db_pool_timeouts_total counter",
+    ]
+    for name, db_engine in (("sync", engine), ("async", async_engine.sync_engine)):
+        status = pool_status(db_engine)
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in status:
+                connections.append(
+                    f"db_pool_connections{_labels(engine=name, state=state)} {status[state]}"
+                )
+        if "timeouts" in status:
+            timeouts.append(f"db_pool_timeouts_total{_labels(engine=name)} {status['timeouts']}")
+    return PlainTextResponse(
+        registry.render() + "\n".join(connections + timeouts) + "\n",
+        media_type="text/plain; version=0.0.4",
+    )
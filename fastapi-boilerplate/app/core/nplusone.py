@@ -0,0 +1,122 @@
+"""
+N+1 query detection for development and tests.
+
+``QueryCounter`` counts the statements run in its context, grouped by SQL
+text; SQLAlchemy keeps parameters out of the text, so one lazy load per
+row shows up as the same statement repeated once per row.
+``NPlusOneMiddleware`` counts every request and, depending on
+``NPLUSONE_DETECTION``, logs or raises when a statement repeats
+``NPLUSONE_THRESHOLD`` times. ``assert_max_queries`` bounds a block of
+test code::
+
+    with assert_max_queries(3):
+        client.get("/api/v1/users/", headers=headers)
+
+The engine listeners are only attached by ``instrument_engine``, so none of
+this costs anything in production.
+"""
+import logging
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.statements.values())
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, threshold: int) -> str:
+        return "".join(
+            f"\n  {count}x {statement}" for statement, count in self.repeated(threshold)
+        )
+
+
+_counters: ContextVar[tuple[QueryCounter, ...]] = ContextVar("query_counters", default=())
+
+
+def _after_cursor_execute(_conn, _cursor, statement, _parameters, _context, _executemany):
+    for counter in _counters.get():
+        counter.statements[statement] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the counters; pass ``async_engine.sync_engine`` for async engines."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count statements run in this context; counters can be nested."""
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+@contextmanager
+def assert_max_queries(
+    limit: int, *, repeat_threshold: int | None = None
+) -> Iterator[QueryCounter]:
+    """
+    Fail when the block runs more than ``limit`` statements, or, with
+    ``repeat_threshold``, any single statement that many times.
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.total > limit:
+        raise NPlusOneError(
+            f"{counter.total} statements run, expected at most {limit}"
+            + counter.report(2)
+        )
+    if repeat_threshold is not None and counter.repeated(repeat_threshold):
+        raise NPlusOneError(
+            "Repeated statements, possible N+1" + counter.report(repeat_threshold)
+        )
+
+
+class NPlusOneMiddleware:
+    def __init__(self, app: ASGIApp, *, threshold: int, raise_errors: bool = False) -> None:
+        self.app = app
+        self.threshold = threshold
+        self.raise_errors = raise_errors
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+            await self.app(scope, receive, send)
+
+        if counter.repeated(self.threshold):
+            message = (
+                f"Possible N+1 in {scope['method']} {scope['path']}: "
+                f"{counter.total} statements" + counter.report(self.threshold)
+            )
+            if self.raise_errors:
+                raise NPlusOneError(message)
+            logger.warning(message)
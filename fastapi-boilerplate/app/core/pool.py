@@ -0,0 +1,103 @@
+"""
+Connection pool classes with checkout/wait-time counters.
+
+The pools behave exactly like the SQLAlchemy ones they extend, they only keep
+a few counters around so pool sizes can be tuned per replica from
+``/utils/db-pool/``.
+"""
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            avg = self.wait_time_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(avg * 1000, 3),
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Time every checkout (queue wait + connect + pre-ping) and count checkins."""
+
+    _stats: PoolStats | None = None
+
+    @property
+    def stats(self) -> PoolStats:
+        if self._stats is None:
+            self._stats = PoolStats()
+        return self._stats
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def _do_return_conn(self, record: Any) -> None:
+        self.stats.record_checkin()
+        super()._do_return_conn(record)  # type: ignore[misc]
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    pool: Pool = engine.pool
+    status: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedPoolMixin):
+        status.update(pool.stats.as_dict())
+    return status
@@ -1,20 +1,34 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with other parameters are upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 
 ALGORITHM = "HS256"
 
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
+def create_access_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    claims: dict[str, Any] | None = None,
+) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -25,3 +39,94 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool (bcrypt releases the GIL),
+    so a burst of logins queues here instead of filling the threadpool that
+    serves sync routes and DB work. At most ``max_workers`` hashes run at
+    once per process; ``stats()`` reports how long calls waited for a slot.
+    """
+
+    def __init__(self, *, max_workers: int) -> None:
+        self.max_workers = max(max_workers, 1)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        submitted = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+
+        def timed() -> tuple[float, float, T]:
+            started = time.perf_counter()
+            result = fn(*args)
+            return started, time.perf_counter(), result
+
+        try:
+            loop = asyncio.get_running_loop()
+            started, finished, result = await loop.run_in_executor(self.executor, timed)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        with self._lock:
+            self.calls += 1
+            waited = started - submitted
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+            self.run_time_total += finished - started
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            calls = self.calls or 1
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "queue_wait_avg_ms": round(self.queue_wait_total / calls * 1000, 3),
+                "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+                "run_time_avg_ms": round(self.run_time_total / calls * 1000, 3),
+            }
+
+
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def averify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify, and return a new hash when the stored one uses outdated parameters."""
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
@@ -2,17 +2,127 @@
 """
 SSO Configuration for Google, Microsoft, and LinkedIn using fastapi-sso
 """
-import os
+import asyncio
+import logging
+import time
+from typing import Any
+
+import httpx
+from fastapi_sso.sso.base import DiscoveryDocument, SSOBase
 from fastapi_sso.sso.google import GoogleSSO
 from fastapi_sso.sso.microsoft import MicrosoftSSO
 from fastapi_sso.sso.linkedin import LinkedInSSO
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """
+    Provider discovery documents shared by every request on the process.
+
+    The first lookup fetches inline (one request per URL however many logins
+    are waiting); after ``ttl`` seconds the cached document keeps being served
+    while a background task refreshes it, and a failed refresh keeps the old
+    document. Fetches go through one pooled ``httpx.AsyncClient`` per provider.
+    """
+
+    def __init__(self, *, ttl: float) -> None:
+        self.ttl = ttl
+        self._documents: dict[str, tuple[float, DiscoveryDocument]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self.fetches = 0
+        self.failures = 0
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        if provider not in self._clients:
+            self._clients[provider] = httpx.AsyncClient(timeout=10.0)
+        return self._clients[provider]
+
+    async def get(self, provider: str, url: str) -> DiscoveryDocument:
+        entry = self._documents.get(url)
+        if entry is None:
+            lock = self._locks.setdefault(url, asyncio.Lock())
+            async with lock:
+                entry = self._documents.get(url)
+                if entry is None:
+                    return await self._fetch(provider, url)
+        fetched_at, document = entry
+        if time.monotonic() - fetched_at > self.ttl and url not in self._refreshing:
+            self._refreshing[url] = asyncio.create_task(self._refresh(provider, url))
+        return document
+
+    async def _fetch(self, provider: str, url: str) -> DiscoveryDocument:
+        self.fetches += 1
+        response = await self.client(provider).get(url)
+        response.raise_for_status()
+        document = response.json()
+        self._documents[url] = (time.monotonic(), document)
+        return document
+
+    async def _refresh(self, provider: str, url: str) -> None:
+        try:
+            await self._fetch(provider, url)
+        except Exception:
+            self.failures += 1
+            logger.exception("Refreshing %s discovery document failed", provider)
+        finally:
+            self._refreshing.pop(url, None)
+
+    async def aclose(self) -> None:
+        for task in self._refreshing.values():
+            task.cancel()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "documents": {
+                url: round(now - fetched_at, 1)
+                for url, (fetched_at, _) in self._documents.items()
+            },
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
+
+
+discovery_cache = DiscoveryCache(ttl=settings.SSO_DISCOVERY_CACHE_TTL_SECONDS)
+
+
+class CachedGoogleSSO(GoogleSSO):
+    """GoogleSSO fetches its discovery document on every endpoint lookup."""
+
+    async def get_discovery_document(self) -> DiscoveryDocument:
+        return await discovery_cache.get(self.provider, self.discovery_url)
+
+
+class SSOProvider:
+    """
+    Configuration for one provider. fastapi-sso keeps per-login state on the
+    SSO object and holds a lock for the whole ``async with`` block, so a
+    single shared instance serializes every login on the process. Each
+    request gets its own instance from ``new()`` instead; building one does
+    no I/O.
+    """
+
+    def __init__(self, sso_class: type[SSOBase], **options: Any) -> None:
+        self.sso_class = sso_class
+        self.options = options
+
+    def new(self) -> SSOBase:
+        return self.sso_class(**self.options)
+
+
 # Google SSO
 google_sso = None
 if settings.GOOGLE_CLIENT_ID and settings.GOOGLE_CLIENT_SECRET:
-    google_sso = GoogleSSO(
+    google_sso = SSOProvider(
+        CachedGoogleSSO,
         client_id=settings.GOOGLE_CLIENT_ID,
         client_secret=settings.GOOGLE_CLIENT_SECRET,
         redirect_uri=f"{settings.SERVER_HOST}/api/v1/auth/google/callback",
@@ -22,7 +132,8 @@ if settings.GOOGLE_CLIENT_ID and settings.GOOGLE_CLIENT_SECRET:
 # Microsoft SSO
 microsoft_sso = None
 if settings.MICROSOFT_CLIENT_ID and settings.MICROSOFT_CLIENT_SECRET:
-    microsoft_sso = MicrosoftSSO(
+    microsoft_sso = SSOProvider(
+        MicrosoftSSO,
         client_id=settings.MICROSOFT_CLIENT_ID,
         client_secret=settings.MICROSOFT_CLIENT_SECRET,
         redirect_uri=f"{settings.SERVER_HOST}/api/v1/auth/microsoft/callback",
@@ -33,9 +144,24 @@ if settings.MICROSOFT_CLIENT_ID and settings.MICROSOFT_CLIENT_SECRET:
 # LinkedIn SSO
 linkedin_sso = None
 if settings.LINKEDIN_CLIENT_ID and settings.LINKEDIN_CLIENT_SECRET:
-    linkedin_sso = LinkedInSSO(
+    linkedin_sso = SSOProvider(
+        LinkedInSSO,
         client_id=settings.LINKEDIN_CLIENT_ID,
         client_secret=settings.LINKEDIN_CLIENT_SECRET,
         redirect_uri=f"{settings.SERVER_HOST}/api/v1/auth/linkedin/callback",
         allow_insecure_http=settings.ENVIRONMENT != "production",
-    )
\ No newline at end of file
+    )
+
+
+async def warm_sso_discovery() -> None:
+    """Fetch discovery documents of configured providers ahead of the first login."""
+    for provider in (google_sso, microsoft_sso, linkedin_sso):
+        if provider is None:
+            continue
+        try:
+            await provider.new().get_discovery_document()
+        except Exception:
+            logger.warning(
+                "Could not warm %s discovery document", provider.sso_class.provider,
+                exc_info=True,
+            )
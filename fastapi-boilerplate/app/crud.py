@@ -1,20 +1,76 @@
 import datetime
+import secrets
 import uuid
 from typing import Any
 
 from sqlmodel import Session, select
-from app.core.security import get_password_hash, verify_password
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.security import (
+    aget_password_hash,
+    averify_and_update_password,
+    get_password_hash,
+    pwd_context,
+)
+from app.mainapps.accounts.cache import (
+    cache_user,
+    get_cached_user,
+    get_cached_user_by_email,
+    invalidate_user,
+)
 from app.mainapps.accounts.models import EmailVerificationToken, Item, User
 from app.mainapps.accounts.serializers import UserCreate, UserUpdate, ItemCreate
 
+# Changing any of these invalidates the claims embedded in issued tokens
+TOKEN_SENSITIVE_FIELDS = {"password", "is_active", "is_superuser", "is_verified"}
+
 
 
 
 
+def get_user(*, session: Session, user_id: uuid.UUID) -> User | None:
+    cached_user = get_cached_user(user_id)
+    if cached_user is not None:
+        return session.merge(cached_user, load=False)
+    session_user = session.get(User, user_id)
+    if session_user:
+        cache_user(session_user)
+    return session_user
 
-def get_user_by_email(*, session: Session, email: str) -> User | None:
+
+async def aget_user(*, session: AsyncSession, user_id: uuid.UUID) -> User | None:
+    cached_user = get_cached_user(user_id)
+    if cached_user is not None:
+        return await session.merge(cached_user, load=False)
+    session_user = await session.get(User, user_id)
+    if session_user:
+        cache_user(session_user)
+    return session_user
+
+
+def get_user_by_email(
+    *, session: Session, email: str, cached: bool = True
+) -> User | None:
+    cached_user = get_cached_user_by_email(email) if cached else None
+    if cached_user is not None:
+        return session.merge(cached_user, load=False)
     statement = select(User).where(User.email == email)
     session_user = session.exec(statement).first()
+    if session_user:
+        cache_user(session_user)
+    return session_user
+
+
+async def aget_user_by_email(
+    *, session: AsyncSession, email: str, cached: bool = True
+) -> User | None:
+    cached_user = get_cached_user_by_email(email) if cached else None
+    if cached_user is not None:
+        return await session.merge(cached_user, load=False)
+    statement = select(User).where(User.email == email)
+    session_user = (await session.exec(statement)).first()
+    if session_user:
+        cache_user(session_user)
     return session_user
 
 
@@ -25,6 +81,20 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    invalidate_user(db_obj.id, email=db_obj.email)
+    return db_obj
+
+
+async def acreate_user(*, session: AsyncSession, user_create: UserCreate) -> User:
+    # bcrypt is CPU bound, keep it off the event loop
+    hashed_password = await aget_password_hash(user_create.password)
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": hashed_password}
+    )
+    session.add(db_obj)
+    await session.commit()
+    await session.refresh(db_obj)
+    invalidate_user(db_obj.id, email=db_obj.email)
     return db_obj
 
 
@@ -37,36 +107,130 @@ def create_superuser(*, session: Session, user_create: UserCreate) -> User:
 
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     user_data = user_in.model_dump(exclude_unset=True)
+    previous_email = db_user.email
     extra_data = {}
     if "password" in user_data:
         password = user_data["password"]
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
+    if TOKEN_SENSITIVE_FIELDS & user_data.keys():
+        extra_data["token_version"] = db_user.token_version + 1
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    invalidate_user(db_user.id, email=previous_email)
+    return db_user
+
+
+async def aupdate_user(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate
+) -> Any:
+    user_data = user_in.model_dump(exclude_unset=True)
+    previous_email = db_user.email
+    extra_data = {}
+    if "password" in user_data:
+        password = user_data["password"]
+        hashed_password = await aget_password_hash(password)
+        extra_data["hashed_password"] = hashed_password
+    if TOKEN_SENSITIVE_FIELDS & user_data.keys():
+        extra_data["token_version"] = db_user.token_version + 1
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    await session.commit()
+    await session.refresh(db_user)
+    invalidate_user(db_user.id, email=previous_email)
     return db_user
 
 
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
-    db_user = get_user_by_email(session=session, email=email)
+    # Never check a password, or is_active, against a cached row
+    db_user = get_user_by_email(session=session, email=email, cached=False)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = pwd_context.verify_and_update(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
+        invalidate_user(db_user.id)
     return db_user
 
 
-def get_or_create_sso_user(session: Session, email: str, full_name: str | None) -> User:
+async def aauthenticate(
+    *, session: AsyncSession, email: str, password: str
+) -> User | None:
+    # Never check a password, or is_active, against a cached row
+    db_user = await aget_user_by_email(session=session, email=email, cached=False)
+    if not db_user:
+        return None
+    verified, new_hash = await averify_and_update_password(
+        password, db_user.hashed_password
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # pwd_context parameters changed since this hash was made
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
+        invalidate_user(db_user.id)
+    return db_user
+
+
+def sso_user_create(email: str, full_name: str | None) -> UserCreate:
+    name_parts = full_name.split(" ", 1) if full_name else ["", ""]
+    return UserCreate(
+        email=email,
+        username=email,
+        first_name=name_parts[0],
+        last_name=name_parts[1] if len(name_parts) > 1 else "",
+        # SSO users never log in with a password; 32 chars fits the 40 max
+        password=secrets.token_urlsafe(24),
+        is_active=True,
+        is_verified=True,  # the provider has verified the email
+    )
+
+
+def get_or_create_sso_user(
+    *,
+    session: Session,
+    email: str,
+    full_name: str | None,
+) -> User:
+    """Get existing user or create new one from SSO provider"""
     user = get_user_by_email(session=session, email=email)
     if user:
+        if not user.is_verified:
+            user = update_user(
+                session=session,
+                db_user=user,
+                user_in=UserUpdate(is_verified=True, is_active=True),
+            )
         return user
+    return create_user(session=session, user_create=sso_user_create(email, full_name))
 
-    password = str(uuid.uuid4())
-    user_create = UserCreate(email=email, password=password, full_name=full_name)
-    user = create_user(session=session, user_create=user_create)
-    return user
+
+async def aget_or_create_sso_user(
+    *,
+    session: AsyncSession,
+    email: str,
+    full_name: str | None,
+) -> User:
+    user = await aget_user_by_email(session=session, email=email)
+    if user:
+        if not user.is_verified:
+            user = await aupdate_user(
+                session=session,
+                db_user=user,
+                user_in=UserUpdate(is_verified=True, is_active=True),
+            )
+        return user
+    return await acreate_user(
+        session=session, user_create=sso_user_create(email, full_name)
+    )
 
 
 def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
@@ -77,6 +241,16 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     return db_item
 
 
+async def acreate_item(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+    session.add(db_item)
+    await session.commit()
+    await session.refresh(db_item)
+    return db_item
+
+
 
 def create_email_verification_token(
     session: Session,
@@ -96,6 +270,24 @@ def create_email_verification_token(
     return db_token
 
 
+async def acreate_email_verification_token(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    token: str,
+    expires_at: datetime
+) -> EmailVerificationToken:
+    """Create an email verification token."""
+    db_token = EmailVerificationToken(
+        user_id=user_id,
+        token=token,
+        expires_at=expires_at
+    )
+    session.add(db_token)
+    await session.commit()
+    await session.refresh(db_token)
+    return db_token
+
+
 def get_email_verification_token(
     session: Session,
     user_id: uuid.UUID,
@@ -105,6 +297,20 @@ def get_email_verification_token(
     statement = select(EmailVerificationToken).where(
         (EmailVerificationToken.user_id == user_id) &
         (EmailVerificationToken.token == token) &
-        (EmailVerificationToken.is_used == False)
+        (EmailVerificationToken.is_used.is_(False))
+    )
+    return session.exec(statement).first()
+
+
+async def aget_email_verification_token(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    token: str
+) -> EmailVerificationToken | None:
+    """Get an email verification token."""
+    statement = select(EmailVerificationToken).where(
+        (EmailVerificationToken.user_id == user_id) &
+        (EmailVerificationToken.token == token) &
+        (EmailVerificationToken.is_used.is_(False))
     )
-    return session.exec(statement).first()
\ No newline at end of file
+    return (await session.exec(statement)).first()
@@ -0,0 +1,144 @@
+"""
+Conditional GET support: weak ETags, If-None-Match and Cache-Control.
+
+Routes take a ``ConditionalRequest`` dependency::
+
+    @router.get("/me")
+    async def read_user_me(
+        current_user: CurrentUser,
+        conditional: Annotated[ConditionalRequest, Depends(conditional_request("private, no-cache"))],
+    ):
+        conditional.check(row_etag(current_user))  # 304 when the client is current
+        return current_user
+
+``row_etag``/``rows_etag`` derive the tag from primary keys and
+``updated_at`` so a match skips serialization entirely; ``respond`` hashes
+a rendered body for models without a row version.
+"""
+import hashlib
+import inspect
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import inspect as sa_inspect
+
+from .responses import ModelResponse
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def row_version(obj: Any) -> tuple | None:
+    """(table, primary key, updated_at) or None when the row has no updated_at."""
+    updated_at = getattr(obj, "updated_at", None)
+    if updated_at is None:
+        return None
+    identity = sa_inspect(obj).identity
+    return (type(obj).__tablename__, identity, updated_at.isoformat())
+
+
+def row_etag(obj: Any, *extra: Any) -> str | None:
+    version = row_version(obj)
+    return None if version is None else make_etag(version, *extra)
+
+
+def rows_etag(rows: Iterable[Any], *extra: Any) -> str | None:
+    versions = []
+    for row in rows:
+        version = row_version(row)
+        if version is None:
+            return None
+        versions.append(version)
+    return make_etag(*versions, *extra)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes don't matter for GET
+    tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ConditionalRequest:
+    def __init__(self, request: Request, response: Response, cache_control: str) -> None:
+        self.request = request
+        self.response = response
+        self.cache_control = cache_control
+
+    def headers(self, etag: str) -> dict[str, str]:
+        return {"ETag": etag, "Cache-Control": self.cache_control}
+
+    def check(self, etag: str | None) -> None:
+        """
+        Raise a 304 when the client already holds ``etag``, otherwise set the
+        validators on the response. ``None`` (no row version) only sets
+        Cache-Control.
+        """
+        if etag is None:
+            self.response.headers["Cache-Control"] = self.cache_control
+            return
+        headers = self.headers(etag)
+        if etag_matches(self.request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        self.response.headers.update(headers)
+
+    def respond(self, response: Response, etag: str | None = None) -> Response:
+        """
+        For endpoints that return a Response themselves (FastAPI does not copy
+        dependency headers onto those). Hashes the body when ``etag`` is None.
+        """
+        etag = etag or body_etag(response.body)
+        headers = self.headers(etag)
+        if etag_matches(self.request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return response
+
+
+def conditional_request(cache_control: str = "private, no-cache") -> Callable[..., ConditionalRequest]:
+    def dependency(request: Request, response: Response) -> ConditionalRequest:
+        return ConditionalRequest(request, response, cache_control)
+
+    return dependency
+
+
+def conditional_endpoint(endpoint: Callable, response_model: Any, cache_control: str) -> Callable:
+    """
+    Wrap a viewset endpoint so its serialized body carries a body-hash ETag
+    and matching If-None-Match requests get a 304. Used by SimpleRouter for
+    views with ``etag = True``.
+    """
+    adapter = TypeAdapter(response_model)
+    signature = inspect.signature(endpoint)
+    request_param = inspect.Parameter(
+        "conditional_http_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+    )
+
+    def wrapper(*args: Any, conditional_http_request: Request, **kwargs: Any) -> Any:
+        result = endpoint(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        response = ModelResponse(adapter.validate_python(result, from_attributes=True))
+        conditional = ConditionalRequest(conditional_http_request, response, cache_control)
+        return conditional.respond(response)
+
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__doc__ = endpoint.__doc__
+    wrapper.__signature__ = signature.replace(  # type: ignore[attr-defined]
+        parameters=[*signature.parameters.values(), request_param]
+    )
+    return wrapper
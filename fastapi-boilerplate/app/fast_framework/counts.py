@@ -0,0 +1,143 @@
+
+import json
+from typing import Any
+
+from sqlalchemy import Table, text
+from sqlmodel import Session, func, select
+
+from app.core.cache import TTLCache
+
+
+def count_rows(db: Session, query) -> int:
+    return db.exec(select(func.count()).select_from(query.subquery())).one()
+
+
+def fetch_page_with_count(
+    db: Session, query, offset: int, limit: int
+) -> tuple[list[Any], int]:
+    """
+    One page of ``query`` plus the total number of matching rows, in a single
+    statement: ``count(*) OVER ()`` is evaluated over the filtered rows before
+    OFFSET/LIMIT apply, so the filter is planned and scanned once. A page past
+    the end has no row to carry the total and falls back to a count query.
+    """
+    entities = len(query.column_descriptions)
+    paged = query.add_columns(func.count().over().label("total_count"))
+    rows = db.execute(paged.offset(offset).limit(limit)).all()
+    if not rows:
+        total = count_rows(db, query) if offset else 0
+        return [], total
+    total = rows[0][-1]
+    if entities == 1:
+        return [row[0] for row in rows], total
+    return [tuple(row[:-1]) for row in rows], total
+
+
+class BaseCountStrategy:
+    """
+    How a paginated list gets its "total". Strategies run on a sync Session;
+    from an AsyncSession use ``await session.run_sync(strategy.count, query)``,
+    or ``strategy.page`` for the page and its total together.
+    """
+
+    def count(self, db: Session, query) -> int:
+        raise NotImplementedError("count() must be implemented by a subclass.")
+
+    def page(self, db: Session, query, offset: int, limit: int) -> tuple[list[Any], int]:
+        total = self.count(db, query)
+        return db.exec(query.offset(offset).limit(limit)).all(), total
+
+
+class ExactCount(BaseCountStrategy):
+    """Exact total; paging gets it from the page query itself via a window count."""
+
+    def count(self, db: Session, query) -> int:
+        return count_rows(db, query)
+
+    def page(self, db: Session, query, offset: int, limit: int) -> tuple[list[Any], int]:
+        return fetch_page_with_count(db, query, offset, limit)
+
+
+class CachedCount(ExactCount):
+    """
+    Exact count, remembered for ``ttl`` seconds per filter signature (the
+    compiled SQL and its parameters), so repeated list calls with the same
+    filters only count once per window.
+    """
+
+    def __init__(self, ttl: float = 30, maxsize: int = 1024):
+        self.cache: TTLCache[int] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def signature(self, db: Session, query) -> tuple[str, str]:
+        compiled = query.compile(dialect=db.get_bind().dialect)
+        return str(compiled), repr(sorted(compiled.params.items()))
+
+    def count(self, db: Session, query) -> int:
+        key = self.signature(db, query)
+        total = self.cache.get(key)
+        if total is None:
+            total = super().count(db, query)
+            self.cache.set(key, total)
+        return total
+
+    # A cached total means the page query alone hits the database
+    page = BaseCountStrategy.page
+
+
+class EstimatedCount(BaseCountStrategy):
+    """
+    Use the Postgres planner's row estimate instead of scanning: pg_class
+    reltuples for an unfiltered table, the EXPLAIN row estimate otherwise.
+    Small results (under ``threshold``) and other databases fall back to
+    ``fallback`` so short lists still show exact totals.
+    """
+
+    def __init__(self, threshold: int = 100_000, fallback: BaseCountStrategy | None = None):
+        self.threshold = threshold
+        self.fallback = fallback or ExactCount()
+
+    def estimate(self, db: Session, query) -> int | None:
+        froms = query.get_final_froms()
+        if query.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+            reltuples = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": froms[0].fullname},
+            ).scalar()
+            # -1 / NULL: never analyzed or no such relation
+            return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+
+        compiled = query.compile(
+            dialect=db.get_bind().dialect,
+            compile_kwargs={"render_postcompile": True},
+        )
+        params: Any = compiled.params
+        if compiled.positional:
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def count(self, db: Session, query) -> int:
+        if db.get_bind().dialect.name != "postgresql":
+            return self.fallback.count(db, query)
+        estimate = self.estimate(db, query)
+        if estimate is None or estimate < self.threshold:
+            return self.fallback.count(db, query)
+        return estimate
+
+
+def get_count_strategy(
+    name: str, *, cache_seconds: float = 30, estimate_threshold: int = 100_000
+) -> BaseCountStrategy:
+    if name == "exact":
+        return ExactCount()
+    if name == "cached":
+        return CachedCount(ttl=cache_seconds)
+    if name == "estimate":
+        return EstimatedCount(
+            threshold=estimate_threshold, fallback=CachedCount(ttl=cache_seconds)
+        )
+    raise ValueError(f"Unknown count strategy: {name!r}")
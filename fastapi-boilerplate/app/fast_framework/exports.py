@@ -0,0 +1,87 @@
+
+import csv
+import io
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+from .responses import construct_from_rows
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def render_ndjson(schema: type[BaseModel], rows: list[Any]) -> bytes:
+    return b"".join(to_json(obj) + b"\n" for obj in construct_from_rows(schema, rows))
+
+
+def render_csv_header(schema: type[BaseModel]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(list(schema.model_fields))
+    return buffer.getvalue().encode()
+
+
+def render_csv(schema: type[BaseModel], rows: list[Any]) -> bytes:
+    names = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in construct_from_rows(schema, rows):
+        values = to_jsonable_python(obj)
+        writer.writerow(["" if values[name] is None else values[name] for name in names])
+    return buffer.getvalue().encode()
+
+
+RENDERERS: dict[str, Callable[[type[BaseModel], list[Any]], bytes]] = {
+    "ndjson": render_ndjson,
+    "csv": render_csv,
+}
+
+# Written once at the start of an export, even an empty one
+HEADER_RENDERERS: dict[str, Callable[[type[BaseModel]], bytes]] = {
+    "csv": render_csv_header,
+}
+
+
+async def stream_export(
+    session_maker: Callable[[], Any],
+    query,
+    schema: type[BaseModel],
+    format: ExportFormat,
+    *,
+    chunk_size: int = 1000,
+) -> AsyncIterator[bytes]:
+    """
+    Yield ``query`` rows rendered as ``format``, ``chunk_size`` rows at a
+    time, from a server-side cursor. The generator opens its own session:
+    request-scoped sessions are closed before a streaming body is sent.
+    """
+    render = RENDERERS[format]
+    async with session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        if format in HEADER_RENDERERS:
+            yield HEADER_RENDERERS[format](schema)
+        async for partition in result.scalars().partitions():
+            yield render(schema, partition)
+
+
+def export_response(
+    session_maker: Callable[[], Any],
+    query,
+    schema: type[BaseModel],
+    format: ExportFormat,
+    *,
+    filename: str,
+    chunk_size: int = 1000,
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(session_maker, query, schema, format, chunk_size=chunk_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
@@ -1,15 +1,27 @@
 
 from fastapi import Request
-from sqlmodel import or_, select
+from sqlalchemy import literal_column
+from sqlmodel import func, or_, select
 
 class BaseFilterBackend:
-    def filter_queryset(self, request: Request, query, view):
+    def filter_queryset(self, request: Request, query, view, db=None):
         raise NotImplementedError("filter_queryset() must be implemented by a subclass.")
 
+    def get_dialect_name(self, view, db=None) -> str | None:
+        """
+        Dialect the query will run on, from ``db`` (a session, sync or async,
+        or an engine) or else ``view.db``; None when neither is known.
+        """
+        db = db if db is not None else getattr(view, "db", None)
+        if db is None:
+            return None
+        bind = db.get_bind() if hasattr(db, "get_bind") else db
+        return bind.dialect.name
+
 class SearchFilter(BaseFilterBackend):
     search_param = "search"
 
-    def filter_queryset(self, request: Request, query, view):
+    def filter_queryset(self, request: Request, query, view, db=None):
         search_term = request.query_params.get(self.search_param)
         if not search_term:
             return query
@@ -24,10 +36,63 @@ class SearchFilter(BaseFilterBackend):
 
         return query.where(or_(*search_filters))
 
+class TrigramSearchFilter(SearchFilter):
+    """
+    Same ILIKE matching as SearchFilter, but meant to be served by pg_trgm GIN
+    indexes (see fast_framework.migrations.create_trigram_index) and ranked
+    by trigram similarity. Falls back to SearchFilter off Postgres, or when
+    no session is passed to tell.
+    """
+
+    def filter_queryset(self, request: Request, query, view, db=None):
+        search_term = request.query_params.get(self.search_param)
+        search_fields = getattr(view, "search_fields", None)
+        if not search_term or not search_fields or self.get_dialect_name(view, db) != "postgresql":
+            return super().filter_queryset(request, query, view, db)
+
+        columns = [getattr(view.model, field) for field in search_fields]
+        query = query.where(or_(*[column.ilike(f"%{search_term}%") for column in columns]))
+        similarities = [func.similarity(column, search_term) for column in columns]
+        rank = func.greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        return query.order_by(rank.desc())
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Postgres full-text search over ``search_fields`` ranked with ts_rank.
+    The expressions match the GIN indexes created by
+    fast_framework.migrations.create_fulltext_index, so keep
+    ``search_config`` in sync with the one used there. Falls back to
+    SearchFilter off Postgres, or when no session is passed to tell.
+    """
+    search_config = "simple"
+
+    def document(self, column):
+        # Literal config (not a bound parameter) so the planner can match the
+        # expression index
+        return func.to_tsvector(
+            literal_column(f"'{self.search_config}'::regconfig"),
+            func.coalesce(column, literal_column("''::text")),
+        )
+
+    def filter_queryset(self, request: Request, query, view, db=None):
+        search_term = request.query_params.get(self.search_param)
+        search_fields = getattr(view, "search_fields", None)
+        if not search_term or not search_fields or self.get_dialect_name(view, db) != "postgresql":
+            return super().filter_queryset(request, query, view, db)
+
+        ts_query = func.websearch_to_tsquery(
+            literal_column(f"'{self.search_config}'::regconfig"), search_term
+        )
+        documents = [self.document(getattr(view.model, field)) for field in search_fields]
+        query = query.where(or_(*[document.op("@@")(ts_query) for document in documents]))
+        ranks = [func.ts_rank(document, ts_query) for document in documents]
+        rank = func.greatest(*ranks) if len(ranks) > 1 else ranks[0]
+        return query.order_by(rank.desc())
+
 class OrderingFilter(BaseFilterBackend):
     ordering_param = "ordering"
 
-    def filter_queryset(self, request: Request, query, view):
+    def filter_queryset(self, request: Request, query, view, db=None):
         ordering = request.query_params.get(self.ordering_param)
         if not ordering:
             return query
@@ -1,5 +1,6 @@
 
 from fastapi import APIRouter, Request
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from typing import Generic, TypeVar, List
 from .pagination import BasePagination
@@ -12,14 +13,36 @@ class GenericAPIView(APIRouter, Generic[ModelType, SerializerType]):
     model: ModelType
     serializer_class: SerializerType
     pagination_class: type[BasePagination] = None
+    # Keyset used by CursorPagination, e.g. ("-created_at", "-id")
+    cursor_ordering: tuple[str, ...] | None = None
     filter_backends: List[type[BaseFilterBackend]] = []
+    # Relationships loaded with one extra query each instead of one per row,
+    # e.g. ("owner",) or ("items.owner",) for nested paths
+    prefetch_related: tuple[str, ...] = ()
+    # Weak ETags (body hash) and If-None-Match handling on list/retrieve
+    etag: bool = False
+    cache_control: str = "private, no-cache"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.db: Session = kwargs.get("db")
 
     def get_queryset(self, db: Session):
-        return select(self.model)
+        query = select(self.model)
+        if self.prefetch_related:
+            query = query.options(*self.get_prefetch_options())
+        return query
+
+    def get_prefetch_options(self):
+        options = []
+        for path in self.prefetch_related:
+            model, option = self.model, None
+            for name in path.split("."):
+                attr = getattr(model, name)
+                option = selectinload(attr) if option is None else option.selectinload(attr)
+                model = attr.property.mapper.class_
+            options.append(option)
+        return options
 
     def get_serializer(self, *args, **kwargs):
         return self.serializer_class(*args, **kwargs)
@@ -29,7 +52,8 @@ class GenericAPIView(APIRouter, Generic[ModelType, SerializerType]):
             return self.pagination_class(request)
         return None
 
-    def filter_queryset(self, request: Request, query):
+    def filter_queryset(self, request: Request, query, db=None):
+        # db (session or engine) lets backends pick dialect-specific SQL
         for backend in self.filter_backends:
-            query = backend().filter_queryset(request, query, self)
+            query = backend().filter_queryset(request, query, self, db=db)
         return query
@@ -0,0 +1,60 @@
+"""
+Alembic helpers for the indexes used by the search filter backends.
+
+Call them from a migration's upgrade()/downgrade(); they are no-ops on
+databases other than Postgres.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def trigram_index_name(table: str, column: str) -> str:
+    return f"ix_{table}_{column}_trgm"
+
+
+def fulltext_index_name(table: str, column: str) -> str:
+    return f"ix_{table}_{column}_fts"
+
+
+def create_trigram_index(table: str, column: str, name: str | None = None) -> None:
+    """GIN pg_trgm index used by TrigramSearchFilter (ILIKE '%term%')."""
+    if not _is_postgres():
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        name or trigram_index_name(table, column),
+        table,
+        [column],
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
+
+def drop_trigram_index(table: str, column: str, name: str | None = None) -> None:
+    if not _is_postgres():
+        return
+    op.drop_index(name or trigram_index_name(table, column), table_name=table)
+
+
+def create_fulltext_index(
+    table: str, column: str, config: str = "simple", name: str | None = None
+) -> None:
+    """GIN index on the to_tsvector() expression used by FullTextSearchFilter."""
+    if not _is_postgres():
+        return
+    op.create_index(
+        name or fulltext_index_name(table, column),
+        table,
+        [sa.text(f"to_tsvector('{config}'::regconfig, coalesce({column}, ''::text))")],
+        postgresql_using="gin",
+    )
+
+
+def drop_fulltext_index(table: str, column: str, name: str | None = None) -> None:
+    if not _is_postgres():
+        return
+    op.drop_index(name or fulltext_index_name(table, column), table_name=table)
@@ -1,5 +1,6 @@
 
 from fastapi import Depends, HTTPException, Request
+from sqlalchemy import delete, insert, inspect, update
 from sqlmodel import Session, select
 from typing import Any, Generic, Type, TypeVar
 from pydantic import BaseModel
@@ -10,7 +11,7 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CreateModelMixin(Generic[ModelType, CreateSchemaType]):
     def create(self, *, db: Session, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = obj_in.dict()
+        obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
         db.commit()
@@ -20,10 +21,10 @@ class CreateModelMixin(Generic[ModelType, CreateSchemaType]):
 class ListModelMixin(Generic[ModelType]):
     def list(self, *, db: Session, request: Request) -> list[ModelType]:
         queryset = self.get_queryset(db)
-        queryset = self.filter_queryset(request, queryset)
+        queryset = self.filter_queryset(request, queryset, db)
         paginator = self.get_paginator(request)
         if paginator:
-            return paginator.paginate(db, queryset)
+            return paginator.paginate(db, queryset, view=self)
         return db.exec(queryset).all()
 
 class RetrieveModelMixin(Generic[ModelType]):
@@ -35,8 +36,8 @@ class RetrieveModelMixin(Generic[ModelType]):
 
 class UpdateModelMixin(Generic[ModelType, UpdateSchemaType]):
     def update(self, *, db: Session, db_obj: ModelType, obj_in: UpdateSchemaType) -> ModelType:
-        obj_data = db_obj.dict()
-        update_data = obj_in.dict(exclude_unset=True)
+        obj_data = db_obj.model_dump()
+        update_data = obj_in.model_dump(exclude_unset=True)
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
@@ -53,3 +54,82 @@ class DestroyModelMixin:
         db.delete(obj)
         db.commit()
         return obj
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def coerce_pks(pk, ids) -> list[Any]:
+    """
+    Convert ids from a JSON body (object keys are always strings) to the
+    primary key's Python type, so they compare equal to the loaded values.
+    """
+    python_type = pk.type.python_type
+    coerced, invalid = [], []
+    for id in ids:
+        try:
+            coerced.append(id if isinstance(id, python_type) else python_type(id))
+        except (TypeError, ValueError):
+            invalid.append(str(id))
+    if invalid:
+        raise HTTPException(status_code=422, detail={"invalid": invalid})
+    return coerced
+
+class BulkCreateModelMixin(Generic[ModelType, CreateSchemaType]):
+    """
+    POST a list of objects: rows go out as multi-row INSERT ... RETURNING
+    statements of ``bulk_chunk_size`` rows, all in one transaction.
+    """
+    bulk_chunk_size: int = 1000
+
+    def bulk_create(self, *, db: Session, objs_in: list[CreateSchemaType]) -> list[ModelType]:
+        # Build model instances so Python-side defaults (ids, timestamps) apply
+        rows = [self.model(**obj_in.model_dump()).model_dump() for obj_in in objs_in]
+        created = []
+        for chunk in chunked(rows, self.bulk_chunk_size):
+            created.extend(db.scalars(insert(self.model).returning(self.model), chunk).all())
+        db.commit()
+        return created
+
+class BulkUpdateModelMixin(Generic[ModelType, UpdateSchemaType]):
+    """
+    PATCH a mapping of primary key -> changes, applied as executemany
+    UPDATEs by primary key in one transaction.
+    """
+    bulk_chunk_size: int = 1000
+
+    def bulk_update(self, *, db: Session, objs_in: dict[Any, UpdateSchemaType]) -> list[ModelType]:
+        pk = inspect(self.model).primary_key[0]
+        ids = coerce_pks(pk, objs_in)
+        found = set()
+        for chunk in chunked(ids, self.bulk_chunk_size):
+            found.update(db.exec(select(pk).where(pk.in_(chunk))).all())
+        missing = [str(id) for id in ids if id not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail={"missing": missing})
+
+        rows = [
+            {pk.key: id, **obj_in.model_dump(exclude_unset=True)}
+            for id, obj_in in zip(ids, objs_in.values(), strict=True)
+        ]
+        for chunk in chunked(rows, self.bulk_chunk_size):
+            db.execute(update(self.model), chunk)
+        db.commit()
+
+        updated = []
+        for chunk in chunked(ids, self.bulk_chunk_size):
+            updated.extend(db.exec(select(self.model).where(pk.in_(chunk))).all())
+        return updated
+
+class BulkDestroyModelMixin:
+    """DELETE a list of primary keys, ``bulk_chunk_size`` ids per statement."""
+    bulk_chunk_size: int = 1000
+
+    def bulk_destroy(self, *, db: Session, ids: list[Any]) -> int:
+        pk = inspect(self.model).primary_key[0]
+        deleted = 0
+        for chunk in chunked(coerce_pks(pk, ids), self.bulk_chunk_size):
+            deleted += db.execute(delete(self.model).where(pk.in_(chunk))).rowcount
+        db.commit()
+        return deleted
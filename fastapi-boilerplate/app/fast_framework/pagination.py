@@ -1,8 +1,14 @@
 
-from typing import Generic, Optional, TypeVar
-from fastapi import Request
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Generic, TypeVar
+from fastapi import HTTPException, Request
 from pydantic import BaseModel
-from sqlmodel import Session, select, func
+from sqlmodel import Session, and_, or_
+
+from .counts import BaseCountStrategy, ExactCount
 
 T = TypeVar("T")
 
@@ -12,8 +18,15 @@ class Page(BaseModel, Generic[T]):
     size: int
     total: int
     items: list[T]
-    next_page: Optional[int] = None
-    previous_page: Optional[int] = None
+    next_page: int | None = None
+    previous_page: int | None = None
+
+
+class CursorPage(BaseModel, Generic[T]):
+    size: int
+    items: list[T]
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
 
 
 class BasePagination:
@@ -27,9 +40,16 @@ class BasePagination:
 
 
 class PageNumberPagination(BasePagination):
-    def paginate(self, db: Session, query, **kwargs):
-        total = db.exec(select(func.count()).select_from(query.subquery())).one()
-        items = db.exec(query.offset((self.page - 1) * self.size).limit(self.size)).all()
+    # Overridable per view with a ``count_strategy`` attribute
+    count_strategy: BaseCountStrategy = ExactCount()
+
+    def get_count_strategy(self, view=None) -> BaseCountStrategy:
+        return getattr(view, "count_strategy", None) or self.count_strategy
+
+    def paginate(self, db: Session, query, view=None, **kwargs):
+        items, total = self.get_count_strategy(view).page(
+            db, query, offset=(self.page - 1) * self.size, limit=self.size
+        )
 
         next_page = self.page + 1 if self.page * self.size < total else None
         previous_page = self.page - 1 if self.page > 1 else None
@@ -42,3 +62,120 @@ class PageNumberPagination(BasePagination):
             next_page=next_page,
             previous_page=previous_page,
         )
+
+
+class CursorPagination(BasePagination):
+    """
+    Keyset pagination: every page is an index range scan starting right after
+    the last row of the previous one, so the cost stays O(size) however deep
+    the client goes. There is no total count.
+
+    The ordering comes from ``view.cursor_ordering`` (falling back to
+    ``ordering``), takes precedence over any ``order_by`` already on the query,
+    and must be unique: end it with the primary key and back it with an index.
+    """
+    cursor_param = "cursor"
+    size_param = "size"
+    ordering: tuple[str, ...] = ("id",)
+    max_size = 100
+
+    def __init__(self, request: Request, size: int = 10):
+        try:
+            size = int(request.query_params.get(self.size_param, size))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid page size")
+        super().__init__(request, size=max(1, min(size, self.max_size)))
+        self.cursor = request.query_params.get(self.cursor_param)
+
+    def get_ordering(self, view) -> list[tuple[Any, bool]]:
+        if getattr(view, "model", None) is None:
+            raise ValueError(
+                "CursorPagination.paginate() needs a view with a `model` to resolve its ordering."
+            )
+        ordering = getattr(view, "cursor_ordering", None) or self.ordering
+        return [
+            (getattr(view.model, field.lstrip("-")), field.startswith("-"))
+            for field in ordering
+        ]
+
+    def encode_cursor(self, row, columns, reverse: bool) -> str:
+        position = [getattr(row, column.key) for column, _ in columns]
+        payload = json.dumps({"p": position, "r": reverse}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str, columns) -> tuple[list[Any], bool]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            position = [
+                self._coerce(column, value)
+                for (column, _), value in zip(columns, payload["p"], strict=True)
+            ]
+            return position, bool(payload["r"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    def _coerce(column, value):
+        if value is None:
+            return None
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            # e.g. sqlmodel's AutoString; JSON already gave us the right value
+            return value
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is uuid.UUID:
+            return uuid.UUID(value)
+        return python_type(value)
+
+    @staticmethod
+    def _seek(columns, position, reverse: bool):
+        # (a, b) > (x, y) spelled out so mixed asc/desc orderings work too:
+        # a > x OR (a = x AND b > y)
+        clauses = []
+        for index, (column, descending) in enumerate(columns):
+            forward = descending == reverse
+            comparison = column > position[index] if forward else column < position[index]
+            equals = [
+                col == value
+                for (col, _), value in zip(columns[:index], position[:index], strict=True)
+            ]
+            clauses.append(and_(*equals, comparison))
+        return or_(*clauses)
+
+    def paginate(self, db: Session, query, view=None, **kwargs):
+        columns = self.get_ordering(view)
+        reverse = False
+        if self.cursor:
+            position, reverse = self.decode_cursor(self.cursor, columns)
+            query = query.where(self._seek(columns, position, reverse))
+
+        order_by = [
+            column.desc() if descending != reverse else column.asc()
+            for column, descending in columns
+        ]
+        query = query.order_by(None).order_by(*order_by).limit(self.size + 1)
+        items = list(db.exec(query).all())
+
+        has_more = len(items) > self.size
+        items = items[: self.size]
+        if reverse:
+            items.reverse()
+
+        next_cursor = previous_cursor = None
+        if items:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(items[-1], columns, reverse=False)
+            if (has_more and reverse) or (self.cursor and not reverse):
+                previous_cursor = self.encode_cursor(items[0], columns, reverse=True)
+
+        return CursorPage(
+            size=self.size,
+            items=items,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
@@ -0,0 +1,60 @@
+
+import functools
+import inspect
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+
+class ModelResponse(Response):
+    """
+    JSON response for content that is already pydantic models (or lists of
+    them). pydantic-core writes the bytes directly, skipping FastAPI's
+    response_model re-validation and jsonable_encoder pass; returning a
+    Response also makes FastAPI ignore ``response_model`` at runtime, so it
+    is still used for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def construct_from_rows(schema: type[BaseModel], rows: Any) -> list[Any]:
+    """
+    Build ``schema`` instances from ORM rows without validation. Only for
+    flat schemas over data the database already holds: validating rows is
+    most of the cost of a list page (e.g. re-checking every stored EmailStr).
+    """
+    names = tuple(schema.model_fields)
+    return [
+        schema.model_construct(**{name: getattr(row, name) for name in names})
+        for row in rows
+    ]
+
+
+def serialize_response(endpoint: Callable, response_model: Any) -> Callable:
+    """
+    Wrap ``endpoint`` so its result is validated into ``response_model`` once
+    (from attributes) and returned as a ModelResponse.
+    """
+    adapter = TypeAdapter(response_model)
+
+    def render(result: Any) -> Any:
+        if isinstance(result, Response):
+            return result
+        return ModelResponse(adapter.validate_python(result, from_attributes=True))
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            return render(await endpoint(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return render(endpoint(*args, **kwargs))
+    return wrapper
@@ -1,6 +1,9 @@
 
 from fastapi import APIRouter
+from .conditional import conditional_endpoint
+from .responses import serialize_response
 from .viewsets import ModelViewSet
+from collections.abc import Callable
 from typing import Any
 
 class SimpleRouter(APIRouter):
@@ -9,6 +12,7 @@ class SimpleRouter(APIRouter):
         prefix: str,
         viewset: type[ModelViewSet],
         *args: Any,
+        validate_response: bool = True,
         **kwargs: Any
     ) -> None:
         """
@@ -17,15 +21,56 @@ class SimpleRouter(APIRouter):
         Args:
             prefix (str): The URL prefix for the viewset.
             viewset (type[ModelViewSet]): The viewset class.
+            validate_response (bool): When False, results are validated into
+                the serializer once and written straight to JSON instead of
+                going through FastAPI's response_model handling.
         """
         
         # We need to instantiate the viewset to access its methods
         vs_instance = viewset()
 
+        def endpoint(method: Callable, response_model: Any) -> Callable:
+            if validate_response:
+                return method
+            return serialize_response(method, response_model)
+
+        def read_endpoint(method: Callable, response_model: Any) -> Callable:
+            if getattr(vs_instance, "etag", False):
+                return conditional_endpoint(method, response_model, vs_instance.cache_control)
+            return endpoint(method, response_model)
+
+        # Bulk routes first so "/bulk" isn't captured by "/{id}"
+        if hasattr(vs_instance, "bulk_create"):
+            self.add_api_route(
+                f"/{prefix}/bulk",
+                endpoint(vs_instance.bulk_create, list[vs_instance.serializer_class]),
+                methods=["POST"],
+                response_model=list[vs_instance.serializer_class],
+                summary=f"Create {vs_instance.model.__name__}s in bulk",
+                status_code=201,
+            )
+
+        if hasattr(vs_instance, "bulk_update"):
+            self.add_api_route(
+                f"/{prefix}/bulk",
+                endpoint(vs_instance.bulk_update, list[vs_instance.serializer_class]),
+                methods=["PATCH"],
+                response_model=list[vs_instance.serializer_class],
+                summary=f"Update {vs_instance.model.__name__}s in bulk",
+            )
+
+        if hasattr(vs_instance, "bulk_destroy"):
+            self.add_api_route(
+                f"/{prefix}/bulk",
+                vs_instance.bulk_destroy,
+                methods=["DELETE"],
+                summary=f"Delete {vs_instance.model.__name__}s in bulk",
+            )
+
         if hasattr(vs_instance, "list"):
             self.add_api_route(
                 f"/{prefix}",
-                vs_instance.list,
+                read_endpoint(vs_instance.list, list[vs_instance.serializer_class]),
                 methods=["GET"],
                 response_model=list[vs_instance.serializer_class],
                 summary=f"List {vs_instance.model.__name__}s",
@@ -34,7 +79,7 @@ class SimpleRouter(APIRouter):
         if hasattr(vs_instance, "create"):
             self.add_api_route(
                 f"/{prefix}",
-                vs_instance.create,
+                endpoint(vs_instance.create, vs_instance.serializer_class),
                 methods=["POST"],
                 response_model=vs_instance.serializer_class,
                 summary=f"Create a new {vs_instance.model.__name__}",
@@ -44,7 +89,7 @@ class SimpleRouter(APIRouter):
         if hasattr(vs_instance, "retrieve"):
             self.add_api_route(
                 f"/{prefix}/{{id}}",
-                vs_instance.retrieve,
+                read_endpoint(vs_instance.retrieve, vs_instance.serializer_class),
                 methods=["GET"],
                 response_model=vs_instance.serializer_class,
                 summary=f"Retrieve a {vs_instance.model.__name__}",
@@ -53,7 +98,7 @@ class SimpleRouter(APIRouter):
         if hasattr(vs_instance, "update"):
             self.add_api_route(
                 f"/{prefix}/{{id}}",
-                vs_instance.update,
+                endpoint(vs_instance.update, vs_instance.serializer_class),
                 methods=["PUT", "PATCH"],
                 response_model=vs_instance.serializer_class,
                 summary=f"Update a {vs_instance.model.__name__}",
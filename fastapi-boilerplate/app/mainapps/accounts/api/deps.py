@@ -1,4 +1,6 @@
-from collections.abc import Generator
+import uuid
+from collections.abc import AsyncGenerator, Generator
+from dataclasses import dataclass
 from typing import Annotated
 
 import jwt
@@ -6,11 +8,17 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
-from sqlmodel import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app import crud
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_session_maker, engine
+from app.fast_framework.conditional import ConditionalRequest, conditional_request
+from app.fast_framework.counts import get_count_strategy
+from app.mainapps.accounts.cache import TokenState, token_state_cache
 from app.mainapps.accounts.models import  User
 from app.mainapps.accounts.serializers import TokenPayload
 
@@ -24,33 +32,137 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_maker() as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
+# ETag/If-None-Match handling for per-user read endpoints
+ConditionalDep = Annotated[ConditionalRequest, Depends(conditional_request("private, no-cache"))]
+
+# Shared by the hand-written list endpoints; use it from an AsyncSession with
+# ``await session.run_sync(list_count_strategy.page, query, skip, limit)``
+list_count_strategy = get_count_strategy(
+    settings.LIST_COUNT_STRATEGY,
+    cache_seconds=settings.LIST_COUNT_CACHE_SECONDS,
+    estimate_threshold=settings.LIST_COUNT_ESTIMATE_THRESHOLD,
+)
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    Authenticated caller built from access token claims, without a user row.
+    Only carries what authorization checks need.
+    """
+    id: uuid.UUID
+    is_active: bool
+    is_superuser: bool
+    is_verified: bool
+    token_version: int
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def decode_access_token(token: str) -> TokenPayload:
     try:
+        # Tokens with an ``aud`` (email verification) are rejected here
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
+        if "purpose" in payload:
+            # Single-purpose tokens issued before they carried an audience
+            raise InvalidTokenError("Not an access token")
         token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+        uuid.UUID(token_data.sub)
+    except (InvalidTokenError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    return token_data
+
+
+def check_token_version(token_data: TokenPayload, token_version: int) -> None:
+    if token_data.token_version is not None and token_data.token_version != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+
+
+async def get_token_state(session: AsyncSession, user_id: uuid.UUID) -> TokenState | None:
+    state = token_state_cache.get(user_id)
+    if state is None:
+        statement = select(User.is_active, User.token_version).where(User.id == user_id)
+        row = (await session.exec(statement)).first()
+        if row is None:
+            return None
+        state = TokenState(is_active=row[0], token_version=row[1])
+        token_state_cache.set(user_id, state)
+    return state
+
+
+async def load_current_user(session: AsyncSession, token_data: TokenPayload) -> User:
+    user = await crud.aget_user(session=session, user_id=uuid.UUID(token_data.sub))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # The user row may come from the longer-lived profile cache; take the
+    # fields that gate access from the token-state cache (or the database)
+    state = await get_token_state(session, user.id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    set_committed_value(user, "is_active", state.is_active)
+    set_committed_value(user, "token_version", state.token_version)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    check_token_version(token_data, user.token_version)
     return user
 
 
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
+    token_data = decode_access_token(token)
+    return await load_current_user(session, token_data)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+async def get_current_principal(
+    session: AsyncSessionDep, token: TokenDep
+) -> User | TokenPrincipal:
+    """
+    Like get_current_user, but when the token carries claims the caller is
+    authorized from them; the database is only asked for (is_active,
+    token_version) once per TOKEN_STATE_CACHE_TTL_SECONDS per user.
+    """
+    token_data = decode_access_token(token)
+    if not settings.ACCESS_TOKEN_EMBED_CLAIMS or token_data.token_version is None:
+        return await load_current_user(session, token_data)
+
+    user_id = uuid.UUID(token_data.sub)
+    state = await get_token_state(session, user_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not state.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    check_token_version(token_data, state.token_version)
+    return TokenPrincipal(
+        id=user_id,
+        is_active=state.is_active,
+        is_superuser=bool(token_data.is_superuser),
+        is_verified=bool(token_data.is_verified),
+        token_version=state.token_version,
+    )
+
+
+CurrentPrincipal = Annotated[User | TokenPrincipal, Depends(get_current_principal)]
+
+
+async def get_current_active_superuser(
+    current_user: CurrentPrincipal,
+) -> User | TokenPrincipal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -1,86 +1,127 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
 
-from app.mainapps.accounts.api.deps import CurrentUser, SessionDep
+from app.core.db import async_engine, async_session_maker
+from app.fast_framework.exports import ExportFormat, export_response
+from app.fast_framework.filters import OrderingFilter, SearchFilter
+from app.fast_framework.generics import GenericAPIView
+from app.fast_framework.responses import ModelResponse, construct_from_rows
+from app.mainapps.accounts.api.deps import (
+    AsyncSessionDep,
+    ConditionalDep,
+    CurrentPrincipal,
+    list_count_strategy,
+)
 from app.mainapps.accounts.models import Item
 from app.mainapps.accounts.serializers import ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
+class ItemExportView(GenericAPIView):
+    model = Item
+    filter_backends = [SearchFilter, OrderingFilter]
+    search_fields = ["title", "description"]
+    ordering_fields = ["title"]
+
+
+item_export_view = ItemExportView()
+
+
 @router.get("/", response_model=ItemsPublic)
-def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_items(
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
+    conditional: ConditionalDep,
+    skip: int = 0,
+    limit: int = 100,
 ) -> Any:
     """
     Retrieve items.
     """
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+    # Stable pages; per owner this is a range scan of ix_item_owner_id_id
+    statement = select(Item).order_by(Item.id)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    items, count = await session.run_sync(
+        list_count_strategy.page, statement, skip, limit
+    )
+
+    # Items have no row version, so the ETag is a hash of the body
+    return conditional.respond(
+        ModelResponse(
+            ItemsPublic.model_construct(data=construct_from_rows(ItemPublic, items), count=count)
         )
-        items = session.exec(statement).all()
+    )
 
-    return ItemsPublic(data=items, count=count)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_items(
+    request: Request, current_user: CurrentPrincipal, format: ExportFormat = "ndjson"
+) -> Any:
+    """
+    Stream items as NDJSON or CSV, with the same ``search`` and ``ordering``
+    parameters as the other list views.
+    """
+    query = item_export_view.filter_queryset(
+        request, item_export_view.get_queryset(None), db=async_engine
+    )
+    if not current_user.is_superuser:
+        query = query.where(Item.owner_id == current_user.id)
+    return export_response(
+        async_session_maker, query, ItemPublic, format, filename="items"
+    )
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_item(
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
+    conditional: ConditionalDep,
+    id: uuid.UUID,
+) -> Any:
     """
     Get item by ID.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return item
+    return conditional.respond(ModelResponse(ItemPublic.model_validate(item)))
 
 
 @router.post("/", response_model=ItemPublic)
-def create_item(
-    *, session: SessionDep, current_user: CurrentUser, item_in: ItemCreate
+async def create_item(
+    *, session: AsyncSessionDep, current_user: CurrentPrincipal, item_in: ItemCreate
 ) -> Any:
     """
     Create new item.
     """
     item = Item.model_validate(item_in, update={"owner_id": current_user.id})
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return item
 
 
 @router.put("/{id}", response_model=ItemPublic)
-def update_item(
+async def update_item(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
     id: uuid.UUID,
     item_in: ItemUpdate,
 ) -> Any:
     """
     Update an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
@@ -88,23 +129,23 @@ def update_item(
     update_dict = item_in.model_dump(exclude_unset=True)
     item.sqlmodel_update(update_dict)
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return item
 
 
 @router.delete("/{id}")
-def delete_item(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_item(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, id: uuid.UUID
 ) -> Message:
     """
     Delete an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await session.commit()
     return Message(message="Item deleted successfully")
@@ -1,20 +1,22 @@
-from datetime import timedelta, datetime
+from datetime import datetime
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm.attributes import flag_modified
 
 from app import crud
-from app.mainapps.accounts.api.deps import CurrentUser, SessionDep, get_current_active_superuser
-from app.core import security
-from app.core.config import settings
-from app.core.security import get_password_hash
+from app.mainapps.accounts.api.deps import AsyncSessionDep, CurrentUser, get_current_active_superuser
+from app.core.security import aget_password_hash
+from app.mainapps.accounts.cache import invalidate_user
+from app.mainapps.accounts.last_login import last_login_buffer
+from app.mainapps.accounts.outbox import enqueue_email
 from app.mainapps.accounts.serializers import Message, NewPassword, Token, UserPublic
 from app.mainapps.accounts.utils import (
+    generate_access_token,
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
     verify_password_reset_token,
 )
 
@@ -22,32 +24,36 @@ router = APIRouter(tags=["login"])
 
 
 @router.post("/login/access-token")
-def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+async def login_access_token(
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
+    user = await crud.aauthenticate(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    user.last_login = datetime.utcnow()
-    session.add(user)
-    session.commit()
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return Token(
-        access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        )
-    )
+    now = datetime.utcnow()
+    ip = request.client.host if request.client else None
+    if not last_login_buffer.record(user.id, now, ip):
+        user.last_login = now
+        user.last_login_ip = ip
+        # A login isn't an edit: writing updated_at back as is skips onupdate
+        flag_modified(user, "updated_at")
+        session.add(user)
+        await session.commit()
+        invalidate_user(user.id)
+    return Token(access_token=generate_access_token(user))
 
 
 @router.post("/login/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: CurrentUser) -> Any:
     """
     Test access token
     """
@@ -55,11 +61,11 @@ def test_token(current_user: CurrentUser) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-def recover_password(email: str, session: SessionDep) -> Message:
+async def recover_password(email: str, session: AsyncSessionDep) -> Message:
     """
     Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.aget_user_by_email(session=session, email=email)
 
     if not user:
         raise HTTPException(
@@ -70,7 +76,7 @@ def recover_password(email: str, session: SessionDep) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    send_email(
+    await enqueue_email(
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -79,14 +85,14 @@ def recover_password(email: str, session: SessionDep) -> Message:
 
 
 @router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.aget_user_by_email(session=session, email=email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -94,10 +100,12 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await aget_password_hash(body.new_password)
     user.hashed_password = hashed_password
+    user.token_version += 1
     session.add(user)
-    session.commit()
+    await session.commit()
+    invalidate_user(user.id)
     return Message(message="Password updated successfully")
 
 
@@ -106,11 +114,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     dependencies=[Depends(get_current_active_superuser)],
     response_class=HTMLResponse,
 )
-def recover_password_html_content(email: str, session: SessionDep) -> Any:
+async def recover_password_html_content(email: str, session: AsyncSessionDep) -> Any:
     """
     HTML Content for Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.aget_user_by_email(session=session, email=email)
 
     if not user:
         raise HTTPException(
@@ -2,39 +2,46 @@
 """
 SSO Authentication endpoints for Google, Microsoft, and LinkedIn
 """
-from fastapi import APIRouter, Depends, Request, HTTPException, status
+from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import RedirectResponse
-from sqlmodel import Session
 
 from app import crud
-from app.mainapps.accounts.api import deps
+from app.mainapps.accounts.api.deps import AsyncSessionDep
 from app.core.config import settings
-from app.core.security import create_access_token
-from app.core.sso import google_sso, microsoft_sso, linkedin_sso
 from app.mainapps.accounts.serializers import UserPublic
+from app.mainapps.accounts.utils import generate_access_token
 
 router = APIRouter(prefix="/oauth", tags=["sso-auth"])
 
 
+def get_provider(name: str):
+    # fastapi_sso and its httpx client are only imported once SSO is used
+    from app.core import sso
+
+    return getattr(sso, f"{name}_sso")
+
+
 # ============ GOOGLE SSO ============
 
 @router.get("/google/login")
 async def google_login():
     """Initialize Google login and redirect to Google"""
+    google_sso = get_provider("google")
     if google_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Google SSO is not configured",
         )
-    async with google_sso:
-        return await google_sso.get_login_redirect(
+    async with google_sso.new() as sso:
+        return await sso.get_login_redirect(
             params={"prompt": "consent", "access_type": "offline"}
         )
 
 
 @router.get("/google/callback", response_model=UserPublic)
-async def google_callback(request: Request, session: Session = Depends(deps.get_db)):
+async def google_callback(request: Request, session: AsyncSessionDep):
     """Handle Google OAuth callback"""
+    google_sso = get_provider("google")
     if google_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -42,8 +49,8 @@ async def google_callback(request: Request, session: Session = Depends(deps.get_
         )
     
     try:
-        async with google_sso:
-            user_info = await google_sso.verify_and_process(request)
+        async with google_sso.new() as sso:
+            user_info = await sso.verify_and_process(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,18 +58,14 @@ async def google_callback(request: Request, session: Session = Depends(deps.get_
         )
     
     # Get or create user
-    user = crud.get_or_create_sso_user(
+    user = await crud.aget_or_create_sso_user(
         session=session,
         email=user_info.email,
         full_name=user_info.display_name,
-        provider="google",
-        provider_id=user_info.id,
     )
     
     # Create access token
-    access_token = create_access_token(
-        user.id, expires_delta=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    access_token = generate_access_token(user)
     
     # Redirect to frontend with token
     redirect_url = f"{settings.FRONTEND_HOST}/auth/callback?token={access_token}"
@@ -74,18 +77,20 @@ async def google_callback(request: Request, session: Session = Depends(deps.get_
 @router.get("/microsoft/login")
 async def microsoft_login():
     """Initialize Microsoft login and redirect to Microsoft"""
+    microsoft_sso = get_provider("microsoft")
     if microsoft_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Microsoft SSO is not configured",
         )
-    async with microsoft_sso:
-        return await microsoft_sso.get_login_redirect()
+    async with microsoft_sso.new() as sso:
+        return await sso.get_login_redirect()
 
 
 @router.get("/microsoft/callback", response_model=UserPublic)
-async def microsoft_callback(request: Request, session: Session = Depends(deps.get_db)):
+async def microsoft_callback(request: Request, session: AsyncSessionDep):
     """Handle Microsoft OAuth callback"""
+    microsoft_sso = get_provider("microsoft")
     if microsoft_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -93,8 +98,8 @@ async def microsoft_callback(request: Request, session: Session = Depends(deps.g
         )
     
     try:
-        async with microsoft_sso:
-            user_info = await microsoft_sso.verify_and_process(request)
+        async with microsoft_sso.new() as sso:
+            user_info = await sso.verify_and_process(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,18 +107,14 @@ async def microsoft_callback(request: Request, session: Session = Depends(deps.g
         )
     
     # Get or create user
-    user = crud.get_or_create_sso_user(
+    user = await crud.aget_or_create_sso_user(
         session=session,
         email=user_info.email,
         full_name=user_info.display_name,
-        provider="microsoft",
-        provider_id=user_info.id,
     )
     
     # Create access token
-    access_token = create_access_token(
-        user.id, expires_delta=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    access_token = generate_access_token(user)
     
     # Redirect to frontend with token
     redirect_url = f"{settings.FRONTEND_HOST}/auth/callback?token={access_token}"
@@ -125,18 +126,20 @@ async def microsoft_callback(request: Request, session: Session = Depends(deps.g
 @router.get("/linkedin/login")
 async def linkedin_login():
     """Initialize LinkedIn login and redirect to LinkedIn"""
+    linkedin_sso = get_provider("linkedin")
     if linkedin_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="LinkedIn SSO is not configured",
         )
-    async with linkedin_sso:
-        return await linkedin_sso.get_login_redirect()
+    async with linkedin_sso.new() as sso:
+        return await sso.get_login_redirect()
 
 
 @router.get("/linkedin/callback", response_model=UserPublic)
-async def linkedin_callback(request: Request, session: Session = Depends(deps.get_db)):
+async def linkedin_callback(request: Request, session: AsyncSessionDep):
     """Handle LinkedIn OAuth callback"""
+    linkedin_sso = get_provider("linkedin")
     if linkedin_sso is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -144,8 +147,8 @@ async def linkedin_callback(request: Request, session: Session = Depends(deps.ge
         )
     
     try:
-        async with linkedin_sso:
-            user_info = await linkedin_sso.verify_and_process(request)
+        async with linkedin_sso.new() as sso:
+            user_info = await sso.verify_and_process(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -153,18 +156,14 @@ async def linkedin_callback(request: Request, session: Session = Depends(deps.ge
         )
     
     # Get or create user
-    user = crud.get_or_create_sso_user(
+    user = await crud.aget_or_create_sso_user(
         session=session,
         email=user_info.email,
         full_name=user_info.display_name,
-        provider="linkedin",
-        provider_id=user_info.id,
     )
     
     # Create access token
-    access_token = create_access_token(
-        user.id, expires_delta=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    access_token = generate_access_token(user)
     
     # Redirect to frontend with token
     redirect_url = f"{settings.FRONTEND_HOST}/auth/callback?token={access_token}"
@@ -1,17 +1,28 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.mainapps.accounts.api.deps import (
+    AsyncSessionDep,
+    ConditionalDep,
+    CurrentPrincipal,
     CurrentUser,
-    SessionDep,
     get_current_active_superuser,
+    list_count_strategy,
 )
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.db import async_engine, async_session_maker
+from app.core.security import aget_password_hash, averify_password
+from app.fast_framework.conditional import row_etag, rows_etag
+from app.fast_framework.exports import ExportFormat, export_response
+from app.fast_framework.filters import OrderingFilter, SearchFilter
+from app.fast_framework.generics import GenericAPIView
+from app.fast_framework.responses import ModelResponse, construct_from_rows
+from app.mainapps.accounts.cache import invalidate_user, used_verification_tokens
 from app.mainapps.accounts.models import (
     Item,
     User,
@@ -26,50 +37,92 @@ from app.mainapps.accounts.serializers import (
     UserUpdateMe,
     UsersPublic,
 )
-from app.mainapps.accounts.utils import generate_new_account_email, generate_verification_email, send_email
+from app.mainapps.accounts.outbox import enqueue_email
+from app.mainapps.accounts.utils import (
+    generate_email_verification_token,
+    generate_new_account_email,
+    generate_verification_email,
+    is_stateless_verification_token,
+    verify_email_verification_token,
+)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+class UserExportView(GenericAPIView):
+    model = User
+    filter_backends = [SearchFilter, OrderingFilter]
+    search_fields = ["email", "username", "first_name", "last_name"]
+    ordering_fields = ["email", "first_name", "last_name", "created_at", "last_login"]
+
+
+user_export_view = UserExportView()
+
+
 @router.get(
     "/",
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_users(
+    session: AsyncSessionDep, conditional: ConditionalDep, skip: int = 0, limit: int = 100
+) -> Any:
     """
     Retrieve users.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    # Stable pages, read in ix_accounts_user_created_at_id order
+    statement = select(User).order_by(User.created_at, User.id)
+    users, count = await session.run_sync(
+        list_count_strategy.page, statement, skip, limit
+    )
+
+    etag = rows_etag(users, count)
+    conditional.check(etag)
+    return ModelResponse(
+        UsersPublic.model_construct(data=construct_from_rows(UserPublic, users), count=count),
+        headers=conditional.headers(etag),
+    )
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
 
-    return UsersPublic(data=users, count=count)
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=StreamingResponse,
+)
+async def export_users(request: Request, format: ExportFormat = "ndjson") -> Any:
+    """
+    Stream all users as NDJSON or CSV. Accepts the same ``search`` and
+    ``ordering`` parameters as the other list views.
+    """
+    query = user_export_view.filter_queryset(
+        request, user_export_view.get_queryset(None), db=async_engine
+    )
+    return export_response(
+        async_session_maker, query, UserPublic, format, filename="users"
+    )
 
 
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 )
-def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
+async def create_user(*, session: AsyncSessionDep, user_in: UserCreate) -> Any:
     """
     Create new user.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await crud.aget_user_by_email(session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
 
-    user = crud.create_user(session=session, user_create=user_in)
+    user = await crud.acreate_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        await enqueue_email(
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -78,57 +131,66 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
 
 
 @router.patch("/me", response_model=UserPublic)
-def update_user_me(
-    *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
+async def update_user_me(
+    *, session: AsyncSessionDep, user_in: UserUpdateMe, current_user: CurrentUser
 ) -> Any:
     """
     Update own user.
     """
 
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await crud.aget_user_by_email(session=session, email=user_in.email)
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
     user_data = user_in.model_dump(exclude_unset=True)
+    previous_email = current_user.email
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_user(current_user.id, email=previous_email)
     return current_user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
-    *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
+async def update_password_me(
+    *, session: AsyncSessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    # Cached users carry no password hash; always check the stored one
+    await session.refresh(current_user, ["hashed_password"])
+    if not await averify_password(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await aget_password_hash(body.new_password)
     current_user.hashed_password = hashed_password
+    current_user.token_version += 1
     session.add(current_user)
-    session.commit()
+    await session.commit()
+    invalidate_user(current_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(current_user: CurrentUser, conditional: ConditionalDep) -> Any:
     """
     Get current user.
     """
+    conditional.check(row_etag(current_user))
     return current_user
 
 
 @router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+async def delete_user_me(session: AsyncSessionDep, current_user: CurrentUser) -> Any:
     """
     Delete own user.
     """
@@ -136,8 +198,9 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
+    await session.delete(current_user)
+    await session.commit()
+    invalidate_user(current_user.id, email=current_user.email)
     return Message(message="User deleted successfully")
 
 
@@ -147,12 +210,13 @@ import secrets
 from datetime import datetime, timedelta
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+async def register_user(session: AsyncSessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
-    User will receive an email verification link valid for 24 hours.
+    User will receive an email verification link valid for
+    EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS (24 by default).
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await crud.aget_user_by_email(session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -162,27 +226,32 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     user_create = UserCreate.model_validate(user_in)
     user_create.is_active = False  # Don't activate until email verified
     user_create.is_verified = False
-    user = crud.create_user(session=session, user_create=user_create)
-    
-    verification_token = secrets.token_urlsafe(32)
-    expires_at = datetime.now() + timedelta(hours=24)
+    user = await crud.acreate_user(session=session, user_create=user_create)
     
-    email_verification = crud.create_email_verification_token(
-        session=session,
-        user_id=user.id,
-        token=verification_token,
-        expires_at=expires_at
-    )
+    if settings.EMAIL_VERIFICATION_STATELESS:
+        # Signed and self-contained: no row to write now or look up later
+        verification_token = generate_email_verification_token(user.id)
+    else:
+        verification_token = secrets.token_urlsafe(32)
+        expires_at = datetime.utcnow() + timedelta(
+            hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS
+        )
+        await crud.acreate_email_verification_token(
+            session=session,
+            user_id=user.id,
+            token=verification_token,
+            expires_at=expires_at
+        )
     
     # <CHANGE> Send verification email
     if settings.emails_enabled and user_in.email:
-        verification_link = f"{settings.server_host}/api/v1/users/verify-email/{user.id}/{verification_token}"
+        verification_link = f"{settings.SERVER_HOST}/api/v1/users/verify-email/{user.id}/{verification_token}"
         email_data = generate_verification_email(
             email_to=user_in.email,
             username=user_in.email,
             verification_link=verification_link
         )
-        send_email(
+        await enqueue_email(
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -192,17 +261,20 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Any:
 
 
 @router.post("/verify-email/{user_id}/{token}", response_model=UserPublic)
-def verify_email(
-    session: SessionDep,
+async def verify_email(
+    session: AsyncSessionDep,
     user_id: uuid.UUID,
     token: str
 ) -> Any:
     """
     Verify user email using the token sent to their email.
-    Token is valid for 24 hours.
+    Token is valid for EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS (24 by default).
     """
+    if is_stateless_verification_token(token):
+        return await verify_email_stateless(session, user_id, token)
+
     # <CHANGE> Get user
-    user = session.get(User, user_id)
+    user = await crud.aget_user(session=session, user_id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -210,7 +282,7 @@ def verify_email(
         )
     
     # <CHANGE> Get verification token
-    verification = crud.get_email_verification_token(
+    verification = await crud.aget_email_verification_token(
         session=session,
         user_id=user_id,
         token=token
@@ -239,48 +311,77 @@ def verify_email(
     # <CHANGE> Activate user and mark as verified
     user.is_active = True
     user.is_verified = True
+    # Tokens issued before verification carry stale is_active/is_verified claims
+    user.token_version += 1
     session.add(user)
     
     # <CHANGE> Mark token as used
     verification.is_used = True
     session.add(verification)
     
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
+    invalidate_user(user.id)
     
     return user
 
-@router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
-    """
-    Create new user without the need to be logged in.
-    """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
-    if user:
+
+async def verify_email_stateless(
+    session: AsyncSessionDep, user_id: uuid.UUID, token: str
+) -> User:
+    claims = verify_email_verification_token(token)
+    if not claims or claims.user_id != user_id:
+        raise HTTPException(status_code=400, detail="Invalid verification token")
+    if claims.expired:
         raise HTTPException(
             status_code=400,
-            detail="The user with this email already exists in the system",
+            detail="Verification token has expired. Please sign up again."
         )
-    user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
+    if used_verification_tokens.get(claims.jti):
+        raise HTTPException(
+            status_code=400,
+            detail="This verification token has already been used"
+        )
+
+    user = await crud.aget_user(session=session, user_id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    # Replays this worker hasn't seen: the token did its job already
+    if user.is_verified:
+        raise HTTPException(
+            status_code=400,
+            detail="This verification token has already been used"
+        )
+
+    user.is_active = True
+    user.is_verified = True
+    user.token_version += 1
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    used_verification_tokens.set(claims.jti, True)
+    invalidate_user(user.id)
     return user
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
-    user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+async def read_user_by_id(
+    user_id: uuid.UUID,
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
+    conditional: ConditionalDep,
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = session.get(User, user_id)
-    if user == current_user:
-        return user
-    if not current_user.is_superuser:
+    user = await crud.aget_user(session=session, user_id=user_id)
+    if not (user and user.id == current_user.id) and not current_user.is_superuser:
         raise HTTPException(
             status_code=403,
             detail="The user doesn't have enough privileges",
         )
+    if user:
+        conditional.check(row_etag(user))
     return user
 
 
@@ -289,9 +390,9 @@ def read_user_by_id(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UserPublic,
 )
-def update_user(
+async def update_user(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: uuid.UUID,
     user_in: UserUpdate,
 ) -> Any:
@@ -299,39 +400,40 @@ def update_user(
     Update a user.
     """
 
-    db_user = session.get(User, user_id)
+    db_user = await crud.aget_user(session=session, user_id=user_id)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await crud.aget_user_by_email(session=session, email=user_in.email)
         if existing_user and existing_user.id != user_id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
 
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    db_user = await crud.aupdate_user(session=session, db_user=db_user, user_in=user_in)
     return db_user
 
 
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
-def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+async def delete_user(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, user_id: uuid.UUID
 ) -> Message:
     """
     Delete a user.
     """
-    user = session.get(User, user_id)
+    user = await crud.aget_user(session=session, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
     statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
-    session.delete(user)
-    session.commit()
+    await session.exec(statement)  # type: ignore
+    await session.delete(user)
+    await session.commit()
+    invalidate_user(user_id, email=user.email)
     return Message(message="User deleted successfully")
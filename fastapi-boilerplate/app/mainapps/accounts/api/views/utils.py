@@ -1,9 +1,19 @@
+import sys
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
+from app.core.db import async_engine, engine
+from app.core.pool import pool_status
+from app.core.security import password_hasher
 from app.mainapps.accounts.api.deps import get_current_active_superuser
+from app.mainapps.accounts.cache import token_state_cache, user_cache
+from app.mainapps.accounts.last_login import last_login_buffer
+from app.mainapps.accounts.outbox import email_outbox, enqueue_email
 from app.mainapps.accounts.serializers import Message
-from app.mainapps.accounts.utils import generate_test_email, send_email
+from app.mainapps.accounts.token_purge import token_purge_job
+from app.mainapps.accounts.utils import generate_test_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -13,12 +23,12 @@ router = APIRouter(prefix="/utils", tags=["utils"])
     dependencies=[Depends(get_current_active_superuser)],
     status_code=201,
 )
-def test_email(email_to: EmailStr) -> Message:
+async def test_email(email_to: EmailStr) -> Message:
     """
     Test emails.
     """
     email_data = generate_test_email(email_to=email_to)
-    send_email(
+    await enqueue_email(
         email_to=email_to,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -29,3 +39,80 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def db_pool_metrics() -> dict[str, Any]:
+    """
+    Live connection pool counters for this worker.
+    """
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
+
+
+@router.get(
+    "/caches/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def cache_metrics() -> dict[str, Any]:
+    """
+    Hit/miss/eviction counters of this worker's in-process caches.
+    """
+    stats = {
+        "users": user_cache.stats(),
+        "token_state": token_state_cache.stats(),
+    }
+    # Only loaded once an SSO route has been used; don't import it here
+    sso = sys.modules.get("app.core.sso")
+    if sso is not None:
+        stats["sso_discovery"] = sso.discovery_cache.stats()
+    return stats
+
+
+@router.get(
+    "/email-outbox/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def email_outbox_metrics() -> dict[str, Any]:
+    """
+    Queue depth and delivery counters of this worker's email outbox.
+    """
+    return email_outbox.stats()
+
+
+@router.get(
+    "/last-login-buffer/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def last_login_buffer_metrics() -> dict[str, Any]:
+    """
+    Pending and flushed counters of this worker's write-behind last_login buffer.
+    """
+    return last_login_buffer.stats()
+
+
+@router.get(
+    "/token-purge/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def token_purge_metrics() -> dict[str, Any]:
+    """
+    Runs and rows deleted by this worker's verification token purge job.
+    """
+    return token_purge_job.stats()
+
+
+@router.get(
+    "/password-hasher/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def password_hasher_metrics() -> dict[str, Any]:
+    """
+    Concurrency and queue-time counters of this worker's password hashing pool.
+    """
+    return password_hasher.stats()
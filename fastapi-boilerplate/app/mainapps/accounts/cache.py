@@ -0,0 +1,85 @@
+"""
+Per-worker caches for the authentication hot path.
+
+Writers must call ``invalidate_user`` after committing a change to a user so
+this worker stops serving the old state immediately; other workers pick the
+change up once their entry expires.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.mainapps.accounts.models import User
+
+
+@dataclass(frozen=True)
+class TokenState:
+    is_active: bool
+    token_version: int
+
+
+token_state_cache: TTLCache[TokenState] = TTLCache(
+    maxsize=settings.TOKEN_STATE_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_STATE_CACHE_TTL_SECONDS,
+)
+
+# ids (jti) of stateless email verification tokens already consumed here;
+# the is_verified check catches replays on other workers or after eviction
+used_verification_tokens: TTLCache[bool] = TTLCache(
+    maxsize=settings.EMAIL_VERIFICATION_USED_CACHE_MAX_SIZE,
+    ttl=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS * 3600,
+)
+
+# Column values of recently used users, keyed by id, plus an email -> id
+# index so lookups by email can be served from the same entries.
+user_cache: TTLCache[dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+user_email_index: TTLCache[uuid.UUID] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def cache_user(user: User) -> None:
+    # Credentials are never served from here: the password hash is loaded
+    # from the database by the code that needs it, and is_active /
+    # token_version are checked against token_state_cache
+    user_cache.set(user.id, user.model_dump(exclude={"hashed_password"}))
+    user_email_index.set(user.email, user.id)
+
+
+def get_cached_user(user_id: uuid.UUID) -> User | None:
+    """
+    Return a detached copy of the cached user. Attach it to a session with
+    ``session.merge(user, load=False)``, which doesn't hit the database.
+    ``hashed_password`` is not loaded; refresh it explicitly when needed.
+    """
+    data = user_cache.get(user_id)
+    if data is None:
+        return None
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_cached_user_by_email(email: str) -> User | None:
+    user_id = user_email_index.get(email)
+    if user_id is None:
+        return None
+    user = get_cached_user(user_id)
+    if user is None or user.email != email:
+        return None
+    return user
+
+
+def invalidate_user(user_id: uuid.UUID, email: str | None = None) -> None:
+    token_state_cache.delete(user_id)
+    user_cache.delete(user_id)
+    if email is not None:
+        user_email_index.delete(email)
@@ -0,0 +1,187 @@
+"""
+Write-behind ``last_login`` / ``last_login_ip`` tracking.
+
+A successful login records its timestamp here instead of committing an UPDATE
+on ``accounts_user``; a background task per process flushes the buffer every
+``LAST_LOGIN_FLUSH_INTERVAL_SECONDS`` as a few multi-row
+``UPDATE ... FROM (VALUES ...)`` statements. Repeated logins of the same user
+between flushes collapse into one row, and an update never moves
+``last_login`` backwards, so workers flushing out of order are harmless.
+Entries still buffered when the process is killed are lost; a clean shutdown
+flushes them.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, String, Uuid, bindparam, column, or_, update, values
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.mainapps.accounts.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    # Rows per UPDATE statement
+    batch_size = 1000
+
+    def __init__(self, *, maxsize: int, interval: float) -> None:
+        self.maxsize = maxsize
+        self.interval = interval
+        self.pending: dict[uuid.UUID, tuple[datetime, str | None]] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        self.recorded = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="last-login-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still buffered."""
+        if not self.running:
+            return
+        assert self._task is not None and self._wakeup is not None
+        # Let an in-progress flush finish instead of cancelling it mid-statement
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        await self.flush()
+
+    def record(self, user_id: uuid.UUID, at: datetime, ip: str | None) -> bool:
+        """
+        Buffer a login. Returns False when the buffer is not running or is
+        full, in which case the caller should write the row itself.
+        """
+        if not self.running or self._stopping:
+            return False
+        if user_id in self.pending:
+            self.coalesced += 1
+        elif len(self.pending) >= self.maxsize:
+            self.rejected += 1
+            return False
+        self.pending[user_id] = (at, ip)
+        self.recorded += 1
+        if len(self.pending) >= self.maxsize:
+            # Flush early rather than start rejecting at the next login
+            self._wakeup.set()  # type: ignore[union-attr]
+        return True
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+        # Swap the buffer out so logins during the flush go to a fresh one
+        pending, self.pending = self.pending, {}
+        rows = [
+            {"id": user_id, "last_login": at, "last_login_ip": ip}
+            for user_id, (at, ip) in pending.items()
+        ]
+        started = time.perf_counter()
+        try:
+            # Core connection: no ORM session or identity map to keep in sync
+            async with async_engine.begin() as conn:
+                for start in range(0, len(rows), self.batch_size):
+                    chunk = rows[start:start + self.batch_size]
+                    if conn.dialect.name == "postgresql":
+                        await conn.execute(self.values_update(chunk))
+                    else:
+                        await conn.execute(
+                            self.executemany_update(),
+                            [{f"b_{key}": value for key, value in row.items()} for row in chunk],
+                        )
+        except Exception:
+            self.flush_errors += 1
+            logger.exception("Flushing %s last_login updates failed", len(rows))
+            # Put them back unless newer logins already replaced them
+            for user_id, entry in pending.items():
+                if len(self.pending) >= self.maxsize:
+                    break
+                self.pending.setdefault(user_id, entry)
+            return 0
+        self.flushes += 1
+        self.rows_written += len(rows)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return len(rows)
+
+    @staticmethod
+    def values_update(rows: list[dict[str, Any]]):
+        # UPDATE accounts_user SET ... FROM (VALUES ...) AS v WHERE id = v.id
+        logins = values(
+            column("id", Uuid),
+            column("last_login", DateTime),
+            column("last_login_ip", String),
+            name="logins",
+        ).data([(row["id"], row["last_login"], row["last_login_ip"]) for row in rows])
+        return (
+            update(User)
+            .where(User.id == logins.c.id)
+            .where(or_(User.last_login.is_(None), User.last_login < logins.c.last_login))
+            .values(
+                last_login=logins.c.last_login,
+                last_login_ip=logins.c.last_login_ip,
+                # A login isn't an edit: keep updated_at (and the user's ETag)
+                updated_at=User.updated_at,
+            )
+        )
+
+    @staticmethod
+    def executemany_update():
+        # Databases without UPDATE ... FROM (VALUES ...), e.g. SQLite
+        return (
+            update(User)
+            .where(User.id == bindparam("b_id"))
+            .where(or_(User.last_login.is_(None), User.last_login < bindparam("b_last_login")))
+            .values(
+                last_login=bindparam("b_last_login"),
+                last_login_ip=bindparam("b_last_login_ip"),
+                updated_at=User.updated_at,
+            )
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self.pending),
+            "maxsize": self.maxsize,
+            "recorded": self.recorded,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+last_login_buffer = LastLoginBuffer(
+    maxsize=settings.LAST_LOGIN_BUFFER_MAX_SIZE,
+    interval=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+)
@@ -2,7 +2,7 @@ import uuid
 from datetime import date, datetime, timedelta
 
 from pydantic import EmailStr, validator, model_validator
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
 SEX_CHOICES = [("Male", "Male"), ("Female", "Female"), ("Prefer not to say", "Prefer not to say")]
@@ -36,13 +36,42 @@ class UserBase(SQLModel):
 
 
 
+def trigram_index(table: str, column: str) -> Index:
+    # GIN pg_trgm index as created by fast_framework.migrations.create_trigram_index
+    return Index(
+        f"ix_{table}_{column}_trgm",
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
+
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
     __tablename__ = "accounts_user"
+    __table_args__ = (
+        # keyset (cursor) pagination on ("created_at", "id")
+        Index("ix_accounts_user_created_at_id", "created_at", "id"),
+        # search filter (ILIKE '%term%'); needs the pg_trgm extension
+        *(
+            trigram_index("accounts_user", column)
+            for column in ("email", "username", "first_name", "last_name")
+        ),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Bumped whenever issued tokens must stop being honoured (password or
+    # permission changes); compared against the token_version claim
+    token_version: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # Also the row version behind the ETags of user endpoints
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        nullable=False,
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
     verification_tokens: list["EmailVerificationToken"] = Relationship(
         back_populates="user", cascade_delete=True
@@ -66,6 +95,10 @@ class ItemBase(SQLModel):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    __table_args__ = (
+        # per-owner listing is a range scan in primary key order
+        Index("ix_item_owner_id_id", "owner_id", "id"),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="accounts_user.id", nullable=False, ondelete="CASCADE"
@@ -74,12 +107,27 @@ class Item(ItemBase, table=True):
 
 class EmailVerificationToken(SQLModel, table=True):
     __tablename__ = "email_verification_tokens"
+    __table_args__ = (
+        # token_purge: expired unused tokens, and used tokens (few, purged often)
+        Index(
+            "ix_email_verification_tokens_unused_expires_at",
+            "expires_at",
+            postgresql_where=text("NOT is_used"),
+            sqlite_where=text("NOT is_used"),
+        ),
+        Index(
+            "ix_email_verification_tokens_used",
+            "id",
+            postgresql_where=text("is_used"),
+            sqlite_where=text("is_used"),
+        ),
+    )
     
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="accounts_user.id", nullable=False, ondelete="CASCADE")
     token: str = Field(unique=True, index=True)  # Random token
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    expires_at: datetime = Field(nullable=False)  # 24 hours from creation
+    expires_at: datetime = Field(nullable=False)  # Naive UTC, compared with utcnow()
     is_used: bool = Field(default=False)
     
     user: User | None = Relationship(back_populates="verification_tokens")
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+In-process email outbox.
+
+Request handlers call ``enqueue_email`` and return as soon as the message is
+queued; one worker task per process drains the queue in batches over a
+persistent SMTP connection and retries failures with exponential backoff.
+Messages still queued when the process is killed are lost, which is fine for
+the mail sent here (verification, recovery, new account) since users can ask
+for it again.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.mainapps.accounts.utils import get_smtp_options, send_email
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboundEmail:
+    email_to: str
+    subject: str
+    html_content: str
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EmailOutbox:
+    def __init__(
+        self, *, maxsize: int, batch_size: int, max_attempts: int, backoff: float
+    ) -> None:
+        self.maxsize = maxsize
+        self.batch_size = max(batch_size, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff = backoff
+        self.queue: asyncio.Queue[OutboundEmail] | None = None
+        self._task: asyncio.Task | None = None
+        self._smtp: Any = None
+        self.pending_retries = 0
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run(), name="email-outbox")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Give queued messages ``timeout`` seconds to go out, then shut down."""
+        if not self.running:
+            return
+        assert self.queue is not None and self._task is not None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Email outbox stopped with %s queued messages", self.queue.qsize()
+            )
+        if self.pending_retries:
+            logger.warning(
+                "Email outbox stopped with %s messages waiting for a retry",
+                self.pending_retries,
+            )
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        if self._smtp is not None:
+            await run_in_threadpool(self._smtp.close)
+            self._smtp = None
+
+    def put(self, message: OutboundEmail) -> None:
+        """Queue a message; raises ``asyncio.QueueFull`` when at capacity."""
+        assert self.queue is not None, "email outbox is not running"
+        self.queue.put_nowait(message)
+        self.enqueued += 1
+
+    async def _run(self) -> None:
+        assert self.queue is not None
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            now = time.monotonic()
+            for message in batch:
+                waited = now - message.enqueued_at
+                self.queue_wait_total += waited
+                self.queue_wait_max = max(self.queue_wait_max, waited)
+
+            try:
+                results = await run_in_threadpool(self._send_batch, batch)
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                results = [False] * len(batch)
+
+            self.batches += 1
+            for message, ok in zip(batch, results, strict=True):
+                if ok:
+                    self.sent += 1
+                else:
+                    self._schedule_retry(message)
+                self.queue.task_done()
+
+    def _send_batch(self, batch: list[OutboundEmail]) -> list[bool]:
+        # Runs in a worker thread; the backend keeps its SMTP connection open
+        # between batches and reconnects once if the server dropped it.
+        if self._smtp is None:
+            from emails.backend.smtp import SMTPBackend  # type: ignore
+
+            self._smtp = SMTPBackend(**get_smtp_options())
+        results = []
+        for message in batch:
+            try:
+                response = send_email(
+                    email_to=message.email_to,
+                    subject=message.subject,
+                    html_content=message.html_content,
+                    smtp=self._smtp,
+                )
+                ok = bool(response and response.success)
+            except Exception:
+                logger.exception("Sending email to %s failed", message.email_to)
+                ok = False
+            if not ok:
+                # Start the next attempt from a fresh connection
+                self._smtp.close()
+            results.append(ok)
+        return results
+
+    def _schedule_retry(self, message: OutboundEmail) -> None:
+        message.attempts += 1
+        if message.attempts >= self.max_attempts:
+            self.failed += 1
+            logger.error(
+                "Giving up on email to %s after %s attempts",
+                message.email_to,
+                message.attempts,
+            )
+            return
+        delay = self.backoff * 2 ** (message.attempts - 1)
+        self.retried += 1
+        self.pending_retries += 1
+        asyncio.get_running_loop().call_later(delay, self._requeue, message)
+
+    def _requeue(self, message: OutboundEmail) -> None:
+        self.pending_retries -= 1
+        if not self.running:
+            return
+        try:
+            self.queue.put_nowait(message)  # type: ignore[union-attr]
+        except asyncio.QueueFull:
+            self.failed += 1
+            logger.error("Email outbox full, dropping retry to %s", message.email_to)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "depth": self.queue.qsize() if self.queue is not None else 0,
+            "maxsize": self.maxsize,
+            "pending_retries": self.pending_retries,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "queue_wait_avg_ms": round(
+                self.queue_wait_total / max(self.sent + self.failed + self.retried, 1) * 1000, 3
+            ),
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+        }
+
+
+email_outbox = EmailOutbox(
+    maxsize=settings.EMAIL_OUTBOX_MAX_SIZE,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS,
+)
+
+
+async def enqueue_email(*, email_to: str, subject: str, html_content: str) -> None:
+    """
+    Hand a message to the outbox. When the outbox isn't running (disabled,
+    or outside the app lifespan) or is full, the message is sent inline.
+    """
+    if email_outbox.running:
+        try:
+            email_outbox.put(
+                OutboundEmail(email_to=email_to, subject=subject, html_content=html_content)
+            )
+            return
+        except asyncio.QueueFull:
+            logger.warning("Email outbox full, sending to %s inline", email_to)
+    await run_in_threadpool(
+        send_email, email_to=email_to, subject=subject, html_content=html_content
+    )
@@ -42,6 +42,19 @@ class UserUpdateMe(SQLModel):
     email: EmailStr | None = Field(default=None, max_length=255)
 
 
+# One row of a bulk user import: a plain password to hash, or a bcrypt hash
+# carried over from the source system
+class UserImport(UserBase):
+    password: str | None = Field(default=None, min_length=8, max_length=40)
+    hashed_password: str | None = Field(default=None)
+
+    @model_validator(mode='after')
+    def check_one_password(self):
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError('Provide exactly one of password or hashed_password')
+        return self
+
+
 class UpdatePassword(SQLModel):
     current_password: str = Field(min_length=8, max_length=40)
     new_password: str = Field(min_length=8, max_length=40)
@@ -101,6 +114,11 @@ class Token(SQLModel):
 # Contents of JWT token
 class TokenPayload(SQLModel):
     sub: str | None = None
+    # Only present when ACCESS_TOKEN_EMBED_CLAIMS is enabled
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+    is_verified: bool | None = None
+    token_version: int | None = None
 
 
 class NewPassword(SQLModel):
@@ -0,0 +1,185 @@
+"""
+Purge of used and expired email verification tokens.
+
+Rows are deleted in batches of ``TOKEN_PURGE_BATCH_SIZE``, each its own
+short transaction (``DELETE ... WHERE id IN (SELECT id ... LIMIT n)``), so a
+run never holds locks on, or writes WAL for, more than one batch at a time.
+On Postgres the inner select skips rows locked by a concurrent run, so every
+worker can run the job. Expired tokens are found through the partial index on
+unused tokens by ``expires_at``, used ones through the partial index on used
+tokens.
+
+Each worker runs it every ``TOKEN_PURGE_INTERVAL_SECONDS``; from a shell or
+cron::
+
+    python -m app.mainapps.accounts.token_purge --batch-size 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, false, select, true
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.metrics import registry
+from app.mainapps.accounts.models import EmailVerificationToken
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PurgeResult:
+    expired: int = 0
+    used: int = 0
+    batches: int = 0
+    duration: float = 0.0
+
+    @property
+    def purged(self) -> int:
+        return self.expired + self.used
+
+
+def purge_statement(condition, batch_size: int, skip_locked: bool):
+    ids = select(EmailVerificationToken.id).where(condition).limit(batch_size)
+    if skip_locked:
+        ids = ids.with_for_update(skip_locked=True)
+    return delete(EmailVerificationToken).where(
+        EmailVerificationToken.id.in_(ids.scalar_subquery())
+    )
+
+
+async def purge_verification_tokens(
+    *, batch_size: int, max_batches: int | None = None, now: datetime | None = None
+) -> PurgeResult:
+    """Delete used and expired tokens; stops early after ``max_batches`` batches."""
+    now = now or datetime.utcnow()
+    skip_locked = async_engine.dialect.name == "postgresql"
+    conditions = {
+        "expired": (EmailVerificationToken.is_used == false())
+        & (EmailVerificationToken.expires_at < now),
+        "used": EmailVerificationToken.is_used == true(),
+    }
+    result = PurgeResult()
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        for reason, condition in conditions.items():
+            statement = purge_statement(condition, batch_size, skip_locked)
+            while max_batches is None or result.batches < max_batches:
+                async with async_engine.begin() as conn:
+                    deleted = (await conn.execute(statement)).rowcount
+                result.batches += 1
+                setattr(result, reason, getattr(result, reason) + deleted)
+                if deleted < batch_size:
+                    break
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        result.duration = time.perf_counter() - started
+        registry.observe_job(
+            "email_verification_token_purge", result.duration, result.purged, status
+        )
+    return result
+
+
+class TokenPurgeJob:
+    def __init__(self, *, interval: float, batch_size: int, max_batches: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.errors = 0
+        self.purged = 0
+        self.last_result: PurgeResult | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="token-purge")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        assert self._task is not None
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self) -> None:
+        # Spread the workers' runs over the interval
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            try:
+                self.last_result = await purge_verification_tokens(
+                    batch_size=self.batch_size, max_batches=self.max_batches
+                )
+                self.purged += self.last_result.purged
+                if self.last_result.purged:
+                    logger.info("Purged verification tokens: %s", asdict(self.last_result))
+            except Exception:
+                self.errors += 1
+                logger.exception("Verification token purge failed")
+            self.runs += 1
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "errors": self.errors,
+            "purged": self.purged,
+            "last_run": asdict(self.last_result) if self.last_result else None,
+        }
+
+
+token_purge_job = TokenPurgeJob(
+    interval=settings.TOKEN_PURGE_INTERVAL_SECONDS,
+    batch_size=settings.TOKEN_PURGE_BATCH_SIZE,
+    max_batches=settings.TOKEN_PURGE_MAX_BATCHES,
+)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Purge used and expired verification tokens")
+    parser.add_argument("--batch-size", type=int, default=settings.TOKEN_PURGE_BATCH_SIZE)
+    parser.add_argument(
+        "--max-batches", type=int, default=None, help="stop after this many batches"
+    )
+    args = parser.parse_args()
+
+    async def run() -> PurgeResult:
+        try:
+            return await purge_verification_tokens(
+                batch_size=args.batch_size, max_batches=args.max_batches
+            )
+        finally:
+            await async_engine.dispose()
+
+    result = asyncio.run(run())
+    logger.info(
+        "Purged %s tokens (%s expired, %s used) in %s batches, %.2fs",
+        result.purged,
+        result.expired,
+        result.used,
+        result.batches,
+        result.duration,
+    )
+
+
+if __name__ == "__main__":
+    main()
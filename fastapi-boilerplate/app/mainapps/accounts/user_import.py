@@ -0,0 +1,239 @@
+"""
+Bulk user import from CSV or NDJSON.
+
+Rows are streamed and handled ``--batch-size`` at a time:
+
+- each row is validated against ``UserImport``; bad rows are logged with
+  their line number and skipped;
+- emails already in ``accounts_user`` are dropped with one query per batch,
+  before any hashing is spent on them;
+- passwords are hashed in a process pool while the previous batch is being
+  inserted, so bcrypt uses every core and the database is never waiting;
+- rows go in as multi-row ``INSERT ... ON CONFLICT DO NOTHING`` statements,
+  which also skip duplicates within the file or from concurrent signups;
+  a batch is split across as many statements as the driver's bind
+  parameter limit requires, so any ``--batch-size`` works.
+
+Columns are the ``UserBase`` fields plus either ``password`` or
+``hashed_password`` (a bcrypt hash from the source system, imported as is).
+At the default bcrypt cost a core hashes a handful of passwords per second,
+so for millions of users import existing hashes; users whose hash uses other
+parameters are rehashed on their first login::
+
+    python -m app.mainapps.accounts.user_import users.ndjson --workers 8
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.core.security import get_password_hash, pwd_context
+from app.mainapps.accounts.models import User
+from app.mainapps.accounts.serializers import UserImport
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# Bind parameters allowed in one statement: PostgreSQL's wire protocol counts
+# them in an int16, SQLite >= 3.32 defaults SQLITE_MAX_VARIABLE_NUMBER to this
+MAX_BIND_PARAMETERS = {"postgresql": 65_535, "sqlite": 32_766}
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    invalid: int = 0
+    existing: int = 0
+    conflicts: int = 0
+    inserted: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        rate = self.read / self.elapsed if self.elapsed else 0.0
+        return (
+            f"read={self.read} inserted={self.inserted} existing={self.existing} "
+            f"conflicts={self.conflicts} invalid={self.invalid} "
+            f"elapsed={self.elapsed:.1f}s rate={rate:.0f} rows/s"
+        )
+
+
+@dataclass
+class PreparedBatch:
+    rows: list[dict[str, Any]]
+    # Index into rows -> future of the hash for that row's plain password
+    hashes: list[tuple[int, Future[str]]]
+
+
+Record = dict[str, Any] | None
+
+
+def read_records(path: Path, format: ImportFormat) -> Iterator[tuple[int, Record]]:
+    """
+    Yield (line number, record) pairs; empty CSV cells fall back to the
+    defaults. Lines that aren't a JSON object are logged and yielded as None.
+    """
+    with path.open(newline="", encoding="utf-8") as file:
+        if format == "csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, {
+                    key: value
+                    for key, value in record.items()
+                    # Cells beyond the header row end up under the None key
+                    if key is not None and value not in ("", None)
+                }
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    logger.warning("Line %s: invalid JSON: %s", line_number, exc)
+                    record = None
+                else:
+                    if not isinstance(record, dict):
+                        logger.warning("Line %s: not a JSON object", line_number)
+                        record = None
+                yield line_number, record
+
+
+def batched(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def rows_per_insert(dialect: str) -> int:
+    # Every row binds a value for each column of the table
+    return MAX_BIND_PARAMETERS.get(dialect, 32_766) // len(User.__table__.columns)
+
+
+def insert_statement(dialect: str, rows: list[dict[str, Any]]):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    # No conflict target: skip rows clashing on email or username alike
+    return insert(User).values(rows).on_conflict_do_nothing()
+
+
+class UserImporter:
+    def __init__(self, *, batch_size: int, workers: int) -> None:
+        self.batch_size = batch_size
+        self.workers = workers
+        self.stats = ImportStats()
+
+    def validate(self, records: list[tuple[int, Record]]) -> list[UserImport]:
+        users: dict[str, UserImport] = {}
+        for line_number, record in records:
+            self.stats.read += 1
+            if record is None:
+                # Unparseable line, already logged by read_records
+                self.stats.invalid += 1
+                continue
+            try:
+                user = UserImport.model_validate(record)
+            except ValidationError as exc:
+                self.stats.invalid += 1
+                logger.warning("Line %s: %s", line_number, exc.errors(include_url=False))
+                continue
+            if user.hashed_password and pwd_context.identify(user.hashed_password) is None:
+                self.stats.invalid += 1
+                logger.warning("Line %s: unrecognised password hash", line_number)
+                continue
+            if user.email in users:
+                self.stats.conflicts += 1
+                continue
+            users[user.email] = user
+        return list(users.values())
+
+    def drop_existing(self, session: Session, users: list[UserImport]) -> list[UserImport]:
+        emails = [user.email for user in users]
+        existing = set(session.exec(select(User.email).where(User.email.in_(emails))).all())
+        self.stats.existing += len(existing)
+        return [user for user in users if user.email not in existing]
+
+    def prepare(
+        self, session: Session, pool: ProcessPoolExecutor, records: list[tuple[int, Record]]
+    ) -> PreparedBatch:
+        users = self.drop_existing(session, self.validate(records))
+        rows = []
+        hashes = []
+        for user in users:
+            password = user.password
+            # Model defaults (id, created_at, token_version, ...) apply here
+            row = User.model_validate(
+                user, update={"hashed_password": user.hashed_password or ""}
+            ).model_dump()
+            if password is not None:
+                hashes.append((len(rows), pool.submit(get_password_hash, password)))
+            rows.append(row)
+        return PreparedBatch(rows=rows, hashes=hashes)
+
+    def insert(self, session: Session, batch: PreparedBatch) -> None:
+        for index, future in batch.hashes:
+            batch.rows[index]["hashed_password"] = future.result()
+        if not batch.rows:
+            return
+        dialect = session.get_bind().dialect.name
+        inserted = 0
+        for rows in batched(batch.rows, rows_per_insert(dialect)):
+            inserted += session.execute(insert_statement(dialect, rows)).rowcount
+        session.commit()
+        self.stats.inserted += inserted
+        self.stats.conflicts += len(batch.rows) - inserted
+
+    def run(self, records: Iterable[tuple[int, Record]]) -> ImportStats:
+        last_report = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, Session(engine) as session:
+            pending: PreparedBatch | None = None
+            for chunk in batched(records, self.batch_size):
+                # Hash this batch in the pool while the previous one is inserted
+                prepared = self.prepare(session, pool, chunk)
+                if pending is not None:
+                    self.insert(session, pending)
+                pending = prepared
+                if time.perf_counter() - last_report >= 5:
+                    logger.info(self.stats.summary())
+                    last_report = time.perf_counter()
+            if pending is not None:
+                self.insert(session, pending)
+        return self.stats
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON")
+    parser.add_argument("path", type=Path)
+    parser.add_argument(
+        "--format", choices=["csv", "ndjson"], default=None,
+        help="defaults to the file extension (.csv, otherwise ndjson)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    importer = UserImporter(batch_size=args.batch_size, workers=args.workers)
+    stats = importer.run(read_records(args.path, format))
+    logger.info("Import finished: %s", stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,20 @@
 import logging
+import secrets
+import uuid
 from dataclasses import dataclass
+from functools import cache
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-import secrets
 from typing import Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
-from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
 from pydantic import BaseModel
 
-from app.crud import create_user, get_user_by_email
 from app.mainapps.accounts.models import User
-from app.mainapps.accounts.serializers import UserCreate
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,18 +43,55 @@ def generate_verification_email(
             "username": username,
             "email": email_to,
             "verification_link": verification_link,
-            "valid_hours": 24,
+            "valid_hours": settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS,
         },
     )
     return EmailData(html_content=html_content, subject=subject)
 
 
+EMAIL_TEMPLATES_DIR = Path(__file__).resolve().parents[2] / "templates" / "build"
+
+@cache
+def get_email_templates() -> Any:
+    """
+    One jinja2 environment per process: templates are compiled once and kept
+    in memory, and the bytecode cache lets new workers skip compilation too.
+    Built on first use so processes that never send email skip jinja2.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    return Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR),
+        auto_reload=settings.ENVIRONMENT == "local",
+        cache_size=-1,
+    )
+
+
+def precompile_email_templates() -> int:
+    """Load every email template into the environment cache; returns the count."""
+    email_templates = get_email_templates()
+    names = email_templates.list_templates(extensions=["html"])
+    for name in names:
+        email_templates.get_template(name)
+    return len(names)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return get_email_templates().get_template(template_name).render(context)
+
+
+def get_smtp_options() -> dict[str, Any]:
+    smtp_options: dict[str, Any] = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
+    if settings.SMTP_TLS:
+        smtp_options["tls"] = True
+    elif settings.SMTP_SSL:
+        smtp_options["ssl"] = True
+    if settings.SMTP_USER:
+        smtp_options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        smtp_options["password"] = settings.SMTP_PASSWORD
+    return smtp_options
 
 
 def send_email(
@@ -65,24 +99,23 @@ def send_email(
     email_to: str,
     subject: str = "",
     html_content: str = "",
-) -> None:
+    smtp: Any = None,
+) -> Any:
+    """
+    Send one message. ``smtp`` may be an ``emails`` SMTP backend to reuse an
+    open connection; by default a connection is opened for this message.
+    """
+    import emails  # type: ignore
+
     assert settings.emails_enabled, "no provided configuration for email variables"
     message = emails.Message(
         subject=subject,
         html=html_content,
         mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
+    response = message.send(to=email_to, smtp=smtp or get_smtp_options())
     logger.info(f"send email result: {response}")
+    return response
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -130,6 +163,21 @@ def generate_new_account_email(
     return EmailData(html_content=html_content, subject=subject)
 
 
+def generate_access_token(user: User) -> str:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = None
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        claims = {
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+            "is_verified": user.is_verified,
+            "token_version": user.token_version,
+        }
+    return security.create_access_token(
+        user.id, expires_delta=access_token_expires, claims=claims
+    )
+
+
 def generate_password_reset_token(email: str) -> str:
     delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
     now = datetime.now(timezone.utc)
@@ -152,41 +200,59 @@ def verify_password_reset_token(token: str) -> str | None:
     except InvalidTokenError:
         return None
 
-# app/crud.py
-def get_or_create_sso_user(
-    session: Session,
-    email: str,
-    full_name: str,
-    provider: str,
-    provider_id: str,
-) -> User:
-    """Get existing user or create new one from SSO provider"""
-    user = get_user_by_email(session=session, email=email)
-    
-    if user:
-        # Update provider info if needed
-        if not user.is_verified:
-            user.is_verified = True
-            user.is_active = True
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-        return user
-    
-    # <CHANGE> Split full_name into first_name and last_name
-    name_parts = full_name.split(" ", 1) if full_name else ["", ""]
-    first_name = name_parts[0]
-    last_name = name_parts[1] if len(name_parts) > 1 else ""
-    
-    # Create new user from SSO
-    user_create = UserCreate(
-        email=email,
-        username=email,  # <CHANGE> Use email as username
-        first_name=first_name,  # <CHANGE> Use first_name instead of full_name
-        last_name=last_name,    # <CHANGE> Use last_name
-        password=secrets.token_urlsafe(32),  # Random password for SSO users
-        is_active=True,
-        is_verified=True,  # SSO users are pre-verified
+
+EMAIL_VERIFICATION_PURPOSE = "email_verification"
+
+
+@dataclass
+class VerificationClaims:
+    user_id: uuid.UUID
+    jti: str
+    expired: bool
+
+
+def generate_email_verification_token(user_id: uuid.UUID) -> str:
+    """Signed, expiring verification token; nothing is stored."""
+    now = datetime.now(timezone.utc)
+    expires = now + timedelta(hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS)
+    return jwt.encode(
+        {
+            "exp": expires.timestamp(),
+            "nbf": now,
+            "sub": str(user_id),
+            "jti": secrets.token_urlsafe(12),
+            # Keeps access and password reset tokens from verifying an email,
+            # and this token from being accepted as an access token
+            "aud": EMAIL_VERIFICATION_PURPOSE,
+            "purpose": EMAIL_VERIFICATION_PURPOSE,
+        },
+        settings.SECRET_KEY,
+        algorithm=security.ALGORITHM,
     )
-    
-    return create_user(session=session, user_create=user_create)
\ No newline at end of file
+
+
+def is_stateless_verification_token(token: str) -> bool:
+    # Stored tokens are token_urlsafe() strings, which never contain a dot
+    return token.count(".") == 2
+
+
+def verify_email_verification_token(token: str) -> VerificationClaims | None:
+    """Claims of a genuine verification token, expired or not; None otherwise."""
+    try:
+        # exp is checked below so an expired link gets its own error message
+        decoded_token = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[security.ALGORITHM],
+            audience=EMAIL_VERIFICATION_PURPOSE,
+            options={"require": ["aud", "exp", "sub", "jti"], "verify_exp": False},
+        )
+        if decoded_token.get("purpose") != EMAIL_VERIFICATION_PURPOSE:
+            return None
+        return VerificationClaims(
+            user_id=uuid.UUID(decoded_token["sub"]),
+            jti=decoded_token["jti"],
+            expired=decoded_token["exp"] <= datetime.now(timezone.utc).timestamp(),
+        )
+    except (InvalidTokenError, ValueError):
+        return None
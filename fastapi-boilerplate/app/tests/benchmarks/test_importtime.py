@@ -0,0 +1,25 @@
+import os
+
+from app.benchmarks.importtime import measure
+
+# Cold-start budget for `import app.core.asgi`; raise it on slow CI runners
+# with IMPORT_TIME_BUDGET_MS rather than editing the test
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2000))
+
+# Only imported once the feature that needs them is configured or used
+LAZY_PACKAGES = ("fastapi_sso", "emails", "sentry_sdk")
+
+
+def test_app_import_stays_within_budget() -> None:
+    # Measured in a fresh interpreter, so nothing imported by the tests counts
+    records = measure("app.core.asgi")
+    total_ms = sum(record.self_us for record in records) / 1000
+    assert total_ms < IMPORT_TIME_BUDGET_MS, (
+        f"import app.core.asgi took {total_ms:.0f} ms, budget {IMPORT_TIME_BUDGET_MS:.0f} ms;"
+        " run python -m app.benchmarks.importtime --modules to see what grew"
+    )
+
+    imported = {record.module.partition(".")[0] for record in records}
+    assert imported.isdisjoint(LAZY_PACKAGES), sorted(
+        imported.intersection(LAZY_PACKAGES)
+    )
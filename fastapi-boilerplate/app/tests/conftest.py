@@ -0,0 +1,72 @@
+"""
+Tests run against a throwaway SQLite database so they need no server. The
+engines in ``app.core.db`` are swapped before anything else imports them;
+settings the app requires get test defaults unless already set.
+"""
+
+import os
+import tempfile
+from collections.abc import Generator
+from pathlib import Path
+
+for name, value in {
+    "PROJECT_NAME": "test",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "postgres",
+    "FIRST_SUPERUSER": "admin@example.com",
+    "FIRST_SUPERUSER_PASSWORD": "testpassword",
+    "FIRST_SUPERUSER_FIRST_NAME": "Admin",
+    "FIRST_SUPERUSER_LAST_NAME": "User",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.core import db as app_db  # noqa: E402
+
+TEST_DATABASE = Path(tempfile.mkdtemp()) / "test.sqlite"
+app_db.engine = create_engine(f"sqlite:///{TEST_DATABASE}")
+app_db.async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE}")
+app_db.async_session_maker = async_sessionmaker(
+    app_db.async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+from app.core.asgi import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> Generator[None, None, None]:
+    SQLModel.metadata.create_all(app_db.engine)
+    with Session(app_db.engine) as session:
+        app_db.init_db(session)
+    yield
+    app_db.engine.dispose()
+
+
+@pytest.fixture
+def db() -> Generator[Session, None, None]:
+    with Session(app_db.engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client() -> Generator[TestClient, None, None]:
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def superuser_token_headers(client: TestClient) -> dict[str, str]:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={
+            "username": settings.FIRST_SUPERUSER,
+            "password": settings.FIRST_SUPERUSER_PASSWORD,
+        },
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
@@ -0,0 +1,78 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding",
+    [
+        "gzip;q=0",
+        "gzip;q=0.0",
+        "gzip; q=0",
+        "gzip;Q=0.000",
+        "gzip;q=invalid",
+        "",
+        "identity",
+    ],
+)
+def test_refused_or_missing_gzip_is_not_chosen(accept_encoding: str) -> None:
+    assert choose_encoding(accept_encoding) is None
+
+
+@pytest.mark.parametrize(
+    "accept_encoding",
+    ["gzip", "GZIP", "gzip;q=0.5", "deflate, gzip ; q=1", "br;q=0, gzip"],
+)
+def test_accepted_gzip_is_chosen(
+    accept_encoding: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("app.core.compression.brotli", None)
+    assert choose_encoding(accept_encoding) == "gzip"
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/small")
+    def small() -> JSONResponse:
+        return JSONResponse({"ok": True})
+
+    @app.get("/large")
+    def large() -> JSONResponse:
+        return JSONResponse({"rows": ["x" * 100] * 50})
+
+    @app.get("/binary")
+    def binary() -> Response:
+        return Response(b"\0" * 2048, media_type="application/octet-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_large_response_is_compressed_with_one_vary(client: TestClient) -> None:
+    r = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.json() == {"rows": ["x" * 100] * 50}  # decoded by the client
+
+
+def test_small_response_still_varies_on_accept_encoding(client: TestClient) -> None:
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_uncompressed_for_refusing_client_varies_too(client: TestClient) -> None:
+    r = client.get("/large", headers={"Accept-Encoding": "gzip;q=0.0"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_other_content_types_are_left_alone(client: TestClient) -> None:
+    r = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert "vary" not in r.headers
@@ -0,0 +1,117 @@
+import logging
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app.core import db as app_db
+from app.core.nplusone import (
+    NPlusOneMiddleware,
+    assert_max_queries,
+    instrument_engine,
+)
+from app.mainapps.accounts.models import Item, User
+
+OWNERS = 5
+
+
+@pytest.fixture
+def owned_items(db: Session) -> list[uuid.UUID]:
+    instrument_engine(app_db.engine)
+    tag = uuid.uuid4().hex[:8]
+    items = [
+        Item(
+            title=f"item {n}",
+            owner=User(
+                email=f"nplusone-{tag}-{n}@example.com",
+                first_name="N",
+                last_name="PlusOne",
+                hashed_password="x",
+            ),
+        )
+        for n in range(OWNERS)
+    ]
+    db.add_all(items)
+    db.commit()
+    return [item.id for item in items]
+
+
+def test_lazy_loads_in_a_loop_exceed_max_queries(
+    db: Session, owned_items: list[uuid.UUID]
+) -> None:
+    db.expire_all()
+    with pytest.raises(AssertionError, match="statements run, expected at most 2"):
+        with assert_max_queries(2):
+            items = db.exec(select(Item).where(Item.id.in_(owned_items))).all()
+            for item in items:
+                assert item.owner is not None
+
+
+def test_eager_loading_stays_within_max_queries(
+    db: Session, owned_items: list[uuid.UUID]
+) -> None:
+    db.expire_all()
+    with assert_max_queries(2) as counter:
+        items = db.exec(
+            select(Item)
+            .where(Item.id.in_(owned_items))
+            .options(selectinload(Item.owner))
+        ).all()
+        for item in items:
+            assert item.owner is not None
+    assert counter.total == 2
+
+
+def test_repeat_threshold_flags_the_repeated_statement(
+    db: Session, owned_items: list[uuid.UUID]
+) -> None:
+    db.expire_all()
+    with pytest.raises(AssertionError, match="possible N\\+1"):
+        with assert_max_queries(100, repeat_threshold=OWNERS):
+            for item in db.exec(select(Item).where(Item.id.in_(owned_items))).all():
+                assert item.owner is not None
+
+
+def make_app(*, statements: int, raise_errors: bool) -> FastAPI:
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/loop")
+    def loop() -> int:
+        with engine.connect() as conn:
+            for _ in range(statements):
+                conn.execute(text("SELECT 1"))
+        return statements
+
+    app.add_middleware(NPlusOneMiddleware, threshold=3, raise_errors=raise_errors)
+    return app
+
+
+def test_middleware_logs_requests_over_the_threshold(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    client = TestClient(make_app(statements=5, raise_errors=False))
+    with caplog.at_level(logging.WARNING, logger="app.core.nplusone"):
+        assert client.get("/loop").status_code == 200
+    assert "Possible N+1 in GET /loop" in caplog.text
+    assert "5x SELECT 1" in caplog.text
+
+
+def test_middleware_is_quiet_under_the_threshold(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    client = TestClient(make_app(statements=2, raise_errors=False))
+    with caplog.at_level(logging.WARNING, logger="app.core.nplusone"):
+        assert client.get("/loop").status_code == 200
+    assert "Possible N+1" not in caplog.text
+
+
+def test_middleware_raises_over_the_threshold() -> None:
+    client = TestClient(make_app(statements=5, raise_errors=True))
+    with pytest.raises(AssertionError, match="Possible N\\+1 in GET /loop"):
+        client.get("/loop")
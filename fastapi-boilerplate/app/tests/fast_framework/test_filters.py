@@ -0,0 +1,48 @@
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, select
+from starlette.requests import Request
+
+from app.fast_framework.filters import TrigramSearchFilter
+from app.mainapps.accounts.models import User
+
+
+class UserSearchView:
+    model = User
+    search_fields = ["email", "username"]
+
+
+def search(term: str) -> Request:
+    return Request({"type": "http", "query_string": f"search={term}".encode()})
+
+
+def compiled(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_dialect_comes_from_the_session_or_engine_passed_in() -> None:
+    backend = TrigramSearchFilter()
+    sqlite_engine = create_engine("sqlite://")
+    with Session(sqlite_engine) as session:
+        assert backend.get_dialect_name(UserSearchView(), session) == "sqlite"
+    assert backend.get_dialect_name(UserSearchView(), sqlite_engine) == "sqlite"
+    async_engine = create_async_engine("postgresql+asyncpg://u@localhost/db")
+    assert backend.get_dialect_name(UserSearchView(), async_engine) == "postgresql"
+    assert backend.get_dialect_name(UserSearchView()) is None
+
+
+def test_trigram_ranking_only_on_postgres() -> None:
+    backend = TrigramSearchFilter()
+    pg_engine = create_engine("postgresql+psycopg://u@localhost/db")
+    ranked = backend.filter_queryset(
+        search("ann"), select(User), UserSearchView(), pg_engine
+    )
+    assert "similarity(accounts_user.username" in compiled(ranked)
+
+    with Session(create_engine("sqlite://")) as session:
+        plain = backend.filter_queryset(
+            search("ann"), select(User), UserSearchView(), session
+        )
+    assert "ILIKE" in compiled(plain).upper()
+    assert "similarity" not in compiled(plain)
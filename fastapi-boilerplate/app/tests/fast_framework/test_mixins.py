@@ -0,0 +1,87 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Field, Session, SQLModel, create_engine
+
+from app.fast_framework.mixins import BulkDestroyModelMixin, BulkUpdateModelMixin
+
+
+class Widget(SQLModel, table=True):
+    __tablename__ = "test_widget"
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    name: str
+    quantity: int = 0
+
+
+class WidgetUpdate(BaseModel):
+    name: str | None = None
+    quantity: int | None = None
+
+
+class WidgetViewSet(BulkUpdateModelMixin, BulkDestroyModelMixin):
+    model = Widget
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Widget.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_bulk_update_uuid_rows_with_string_keys(db: Session) -> None:
+    first, second = Widget(name="first"), Widget(name="second", quantity=2)
+    db.add_all([first, second])
+    db.commit()
+
+    # Keys as they arrive from a JSON body
+    updated = WidgetViewSet().bulk_update(
+        db=db,
+        objs_in={
+            str(first.id): WidgetUpdate(quantity=5),
+            str(second.id): WidgetUpdate(name="renamed"),
+        },
+    )
+
+    assert {widget.id for widget in updated} == {first.id, second.id}
+    db.expire_all()
+    assert (db.get(Widget, first.id).name, db.get(Widget, first.id).quantity) == (
+        "first",
+        5,
+    )
+    assert (db.get(Widget, second.id).name, db.get(Widget, second.id).quantity) == (
+        "renamed",
+        2,
+    )
+
+
+def test_bulk_update_reports_missing_and_invalid_ids(db: Session) -> None:
+    missing = str(uuid.uuid4())
+    with pytest.raises(HTTPException) as exc:
+        WidgetViewSet().bulk_update(db=db, objs_in={missing: WidgetUpdate(quantity=1)})
+    assert exc.value.status_code == 404
+    assert exc.value.detail == {"missing": [missing]}
+
+    with pytest.raises(HTTPException) as exc:
+        WidgetViewSet().bulk_update(
+            db=db, objs_in={"not-a-uuid": WidgetUpdate(quantity=1)}
+        )
+    assert exc.value.status_code == 422
+
+
+def test_bulk_destroy_uuid_rows_with_string_ids(db: Session) -> None:
+    widget = Widget(name="doomed")
+    db.add(widget)
+    db.commit()
+
+    assert WidgetViewSet().bulk_destroy(db=db, ids=[str(widget.id)]) == 1
+    db.expire_all()
+    assert db.get(Widget, widget.id) is None
@@ -0,0 +1,99 @@
+import uuid
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+from starlette.requests import Request
+
+from app.fast_framework.pagination import CursorPagination
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class Event(SQLModel, table=True):
+    __tablename__ = "test_event"
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    created_at: datetime
+
+
+class EventView:
+    model = Event
+    cursor_ordering = ("-created_at", "-id")
+
+
+@pytest.fixture
+def db() -> Generator[Session, None, None]:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Event.__table__.create(engine)
+    with Session(engine) as session:
+        # Three rows tie on created_at, two more on another timestamp
+        offsets = [0, 1, 1, 1, 2, 3, 3]
+        session.add_all(Event(created_at=START + timedelta(minutes=m)) for m in offsets)
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def paginate(db: Session, cursor: str | None = None, size: int = 2):
+    query_string = f"size={size}" + (f"&cursor={cursor}" if cursor else "")
+    request = Request({"type": "http", "query_string": query_string.encode()})
+    return CursorPagination(request).paginate(db, select(Event), view=EventView())
+
+
+def expected_order(db: Session) -> list[uuid.UUID]:
+    events = db.exec(select(Event)).all()
+    events.sort(key=lambda e: (e.created_at, e.id), reverse=True)
+    return [event.id for event in events]
+
+
+def test_forward_pages_cover_every_row_once_across_ties(db: Session) -> None:
+    pages = [paginate(db)]
+    while pages[-1].next_cursor:
+        pages.append(paginate(db, pages[-1].next_cursor))
+
+    assert [len(page.items) for page in pages] == [2, 2, 2, 1]
+    seen = [event.id for page in pages for event in page.items]
+    assert seen == expected_order(db)
+    assert pages[0].previous_cursor is None
+
+
+def test_previous_cursor_walks_back_to_the_same_pages(db: Session) -> None:
+    forward = [paginate(db)]
+    while forward[-1].next_cursor:
+        forward.append(paginate(db, forward[-1].next_cursor))
+
+    page = forward[-1]
+    backward = [page]
+    while page.previous_cursor:
+        page = paginate(db, page.previous_cursor)
+        backward.append(page)
+
+    assert [[e.id for e in p.items] for p in reversed(backward)] == [
+        [e.id for e in p.items] for p in forward
+    ]
+
+
+def test_rows_inserted_ahead_of_the_cursor_do_not_shift_later_pages(
+    db: Session,
+) -> None:
+    first = paginate(db, size=3)
+    # Newest row, sorts onto the page already read; OFFSET paging would now
+    # serve the last row of the first page again
+    newest = Event(created_at=START + timedelta(minutes=10))
+    db.add(newest)
+    db.commit()
+
+    rest = []
+    cursor = first.next_cursor
+    while cursor:
+        page = paginate(db, cursor, size=3)
+        rest.extend(event.id for event in page.items)
+        cursor = page.next_cursor
+
+    order = [id for id in expected_order(db) if id != newest.id]
+    assert [e.id for e in first.items] + rest == order
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.config import settings
+from app.mainapps.accounts.last_login import LastLoginBuffer, last_login_buffer
+from app.mainapps.accounts.models import User
+
+LAST_EDIT = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_user(db: Session) -> User:
+    user = User(
+        email=f"last-login-{uuid.uuid4().hex[:8]}@example.com",
+        first_name="Last",
+        last_name="Login",
+        hashed_password="x",
+        updated_at=LAST_EDIT,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_flush_keeps_updated_at(db: Session) -> None:
+    user = make_user(db)
+    login_at = datetime(2024, 6, 1, 8, 30, 0)
+    buffer = LastLoginBuffer(maxsize=10, interval=60)
+    buffer.pending[user.id] = (login_at, "10.0.0.1")
+
+    assert asyncio.run(buffer.flush()) == 1
+
+    db.expire_all()
+    user = db.exec(select(User).where(User.id == user.id)).one()
+    assert (user.last_login, user.last_login_ip) == (login_at, "10.0.0.1")
+    assert user.updated_at == LAST_EDIT
+
+
+def test_values_update_writes_updated_at_back_unchanged() -> None:
+    statement = LastLoginBuffer.values_update(
+        [{"id": uuid.uuid4(), "last_login": datetime.utcnow(), "last_login_ip": None}]
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "updated_at=accounts_user.updated_at" in sql
+
+
+def test_login_without_the_buffer_keeps_updated_at(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(last_login_buffer, "record", lambda *_args: False)
+    user = crud.get_user_by_email(
+        session=db, email=settings.FIRST_SUPERUSER, cached=False
+    )
+    updated_at = user.updated_at
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={
+            "username": settings.FIRST_SUPERUSER,
+            "password": settings.FIRST_SUPERUSER_PASSWORD,
+        },
+    )
+    assert r.status_code == 200
+
+    db.expire_all()
+    user = db.exec(select(User).where(User.id == user.id)).one()
+    assert user.last_login is not None
+    assert datetime.utcnow() - user.last_login < timedelta(minutes=1)
+    assert user.updated_at == updated_at
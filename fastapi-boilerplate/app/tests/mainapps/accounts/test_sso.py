@@ -0,0 +1,86 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+from fastapi import Request
+from fastapi_sso.sso.base import OpenID
+from fastapi_sso.sso.google import GoogleSSO
+from sqlmodel import Session, select
+
+from app.core import sso as core_sso
+from app.core.asgi import app
+from app.mainapps.accounts.api.deps import decode_access_token
+from app.mainapps.accounts.models import User
+
+CALLBACKS = 20
+PROVIDER_DELAY = 0.1
+
+
+class StubGoogleSSO(GoogleSSO):
+    """Verifies without calling Google; keeps per-login state on the instance."""
+
+    instances: list["StubGoogleSSO"] = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def verify_and_process(self, request: Request, **_kwargs) -> OpenID:
+        cls = StubGoogleSSO
+        cls.instances.append(self)
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        # Like fastapi-sso's state and tokens: set, then read after an await
+        self.login_number = request.query_params["n"]
+        await asyncio.sleep(PROVIDER_DELAY)
+        cls.in_flight -= 1
+        return OpenID(
+            id=self.login_number,
+            email=f"sso-load-{self.login_number}@example.com",
+            display_name="Load Test",
+            provider=self.provider,
+        )
+
+
+@pytest.fixture
+def stub_google(monkeypatch: pytest.MonkeyPatch) -> None:
+    StubGoogleSSO.instances = []
+    StubGoogleSSO.in_flight = StubGoogleSSO.max_in_flight = 0
+    monkeypatch.setattr(
+        core_sso,
+        "google_sso",
+        core_sso.SSOProvider(
+            StubGoogleSSO,
+            client_id="client-id",
+            client_secret="client-secret",
+            redirect_uri="http://testserver/api/v1/oauth/google/callback",
+            allow_insecure_http=True,
+        ),
+    )
+
+
+async def run_callbacks() -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as c:
+        return await asyncio.gather(
+            *(c.get(f"/api/v1/oauth/google/callback?n={n}") for n in range(CALLBACKS))
+        )
+
+
+@pytest.mark.usefixtures("stub_google")
+def test_concurrent_callbacks_get_their_own_provider(db: Session) -> None:
+    responses = asyncio.run(run_callbacks())
+
+    assert [r.status_code for r in responses] == [307] * CALLBACKS
+    assert len({id(instance) for instance in StubGoogleSSO.instances}) == CALLBACKS
+    # A shared instance holds its lock across the provider round-trip, so
+    # callbacks would reach the provider one at a time
+    assert StubGoogleSSO.max_in_flight == CALLBACKS
+
+    for n, response in enumerate(responses):
+        token = parse_qs(urlparse(response.headers["location"]).query)["token"][0]
+        user = db.exec(
+            select(User).where(User.email == f"sso-load-{n}@example.com")
+        ).one()
+        assert decode_access_token(token).sub == str(user.id)
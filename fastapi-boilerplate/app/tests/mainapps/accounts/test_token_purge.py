@@ -0,0 +1,69 @@
+import asyncio
+import time
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.mainapps.accounts.models import EmailVerificationToken, User
+from app.mainapps.accounts.token_purge import purge_verification_tokens
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset() is not available on this platform")
+    # POSIX TZ string for UTC+14, the largest offset in use
+    monkeypatch.setenv("TZ", "TEST-14")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def signup(client: TestClient, email: str) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/signup",
+        json={
+            "email": email,
+            "password": "password123",
+            "confirm_password": "password123",
+            "first_name": "Test",
+            "last_name": "User",
+        },
+    )
+    assert r.status_code == 200, r.text
+
+
+@pytest.mark.usefixtures("non_utc_host")
+def test_purge_keeps_token_until_it_expires(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "EMAIL_VERIFICATION_STATELESS", False)
+    email = "purge-expiry@example.com"
+    signup(client, email)
+    token = db.exec(
+        select(EmailVerificationToken)
+        .join(User, User.id == EmailVerificationToken.user_id)
+        .where(User.email == email)
+    ).one()
+    lifetime = timedelta(hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS)
+    assert abs(token.expires_at - (datetime.utcnow() + lifetime)) < timedelta(minutes=1)
+
+    def purge(now: datetime) -> int:
+        return asyncio.run(purge_verification_tokens(batch_size=100, now=now)).expired
+
+    def exists() -> bool:
+        statement = select(EmailVerificationToken.id).where(
+            EmailVerificationToken.id == token.id
+        )
+        return db.exec(statement).first() is not None
+
+    purge(token.expires_at - timedelta(minutes=1))
+    assert exists()
+
+    assert purge(token.expires_at + timedelta(minutes=1)) >= 1
+    assert not exists()
@@ -0,0 +1,54 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, func, select
+
+from app.core import db as app_db
+from app.core.security import get_password_hash
+from app.mainapps.accounts import user_import
+from app.mainapps.accounts.models import User
+
+# Low enough that a batch of a few dozen rows needs several statements
+BIND_PARAMETER_LIMIT = 200
+
+
+@pytest.fixture
+def limited_engine(monkeypatch: pytest.MonkeyPatch):
+    """The test database with SQLite enforcing a small bind parameter limit."""
+    engine = create_engine(app_db.engine.url)
+
+    @event.listens_for(engine, "connect")
+    def set_limit(dbapi_connection, _connection_record) -> None:
+        dbapi_connection.setlimit(
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, BIND_PARAMETER_LIMIT
+        )
+
+    monkeypatch.setattr(user_import, "engine", engine)
+    monkeypatch.setitem(user_import.MAX_BIND_PARAMETERS, "sqlite", BIND_PARAMETER_LIMIT)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.usefixtures("limited_engine")
+def test_batch_over_the_bind_parameter_limit(tmp_path: Path, db: Session) -> None:
+    count = user_import.rows_per_insert("sqlite") * 3 + 1
+    hashed_password = get_password_hash("password")
+    path = tmp_path / "users.ndjson"
+    with path.open("w") as file:
+        for n in range(count):
+            record = {
+                "email": f"bulk-{n}@example.com",
+                "hashed_password": hashed_password,
+            }
+            file.write(json.dumps(record) + "\n")
+
+    # One batch, too many rows for a single INSERT under the limit
+    importer = user_import.UserImporter(batch_size=count, workers=1)
+    stats = importer.run(user_import.read_records(path, "ndjson"))
+
+    assert (stats.read, stats.inserted, stats.conflicts) == (count, count, 0)
+    imported = select(func.count()).where(User.email.like("bulk-%@example.com"))
+    assert db.exec(imported).one() == count